@@ -0,0 +1,33 @@
+"""event listing indexes
+
+Revision ID: 03da07a8b134
+Revises: 9dfa9f202725
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03da07a8b134'
+down_revision: Union[str, None] = '9dfa9f202725'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_eventpermission_user_event",
+        "eventpermission",
+        ["user_id", "event_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_eventpermission_user_event", table_name="eventpermission")
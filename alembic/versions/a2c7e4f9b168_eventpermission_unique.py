@@ -0,0 +1,37 @@
+"""eventpermission unique
+
+Revision ID: a2c7e4f9b168
+Revises: f1a4d9b7c352
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c7e4f9b168'
+down_revision: Union[str, None] = 'f1a4d9b7c352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # concurrent shares may have left duplicates; the latest grant wins
+    op.execute(
+        "DELETE FROM eventpermission WHERE id NOT IN "
+        "(SELECT MAX(id) FROM eventpermission GROUP BY event_id, user_id)"
+    )
+    op.create_index(
+        "ux_eventpermission_event_user",
+        "eventpermission",
+        ["event_id", "user_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ux_eventpermission_event_user", table_name="eventpermission")
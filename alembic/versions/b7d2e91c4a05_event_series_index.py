@@ -0,0 +1,39 @@
+"""event series index
+
+Revision ID: b7d2e91c4a05
+Revises: f4c0747f46ef
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e91c4a05'
+down_revision: Union[str, None] = 'f4c0747f46ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_event_owner_recurring", table_name="event")
+    op.create_index(
+        "ix_event_owner_series",
+        "event",
+        ["owner_id", "is_recurring", "start_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_event_owner_series", table_name="event")
+    op.create_index(
+        "ix_event_owner_recurring",
+        "event",
+        ["owner_id", "is_recurring", "recurrence_end"],
+        unique=False,
+    )
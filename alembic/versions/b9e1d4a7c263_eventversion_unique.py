@@ -0,0 +1,73 @@
+"""eventversion unique
+
+Revision ID: b9e1d4a7c263
+Revises: a2c7e4f9b168
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e1d4a7c263'
+down_revision: Union[str, None] = 'a2c7e4f9b168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent updates may have recorded the same version number twice.
+    # Histories with duplicates are renumbered 1..n in (version_number, id)
+    # order, the order their deltas were chained in, and the event's
+    # revision follows its last version.
+    conn = op.get_bind()
+    event_ids = [
+        row.event_id
+        for row in conn.execute(sa.text(
+            "SELECT DISTINCT event_id FROM eventversion "
+            "GROUP BY event_id, version_number HAVING COUNT(*) > 1"
+        )).all()
+    ]
+    for event_id in event_ids:
+        ids = conn.execute(
+            sa.text("SELECT id FROM eventversion WHERE event_id = :e ORDER BY version_number, id"),
+            {"e": event_id},
+        ).scalars().all()
+        if not ids:
+            continue
+        # negative first, so no intermediate state collides
+        conn.execute(
+            sa.text("UPDATE eventversion SET version_number = -version_number WHERE event_id = :e"),
+            {"e": event_id},
+        )
+        conn.execute(
+            sa.text("UPDATE eventversion SET version_number = :n WHERE id = :id"),
+            [{"n": n, "id": version_id} for n, version_id in enumerate(ids, start=1)],
+        )
+        conn.execute(
+            sa.text("UPDATE event SET revision = :n WHERE id = :e"),
+            {"n": len(ids), "e": event_id},
+        )
+
+    op.drop_index("ix_eventversion_event_number", table_name="eventversion")
+    op.create_index(
+        "ux_eventversion_event_number",
+        "eventversion",
+        ["event_id", "version_number"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ux_eventversion_event_number", table_name="eventversion")
+    op.create_index(
+        "ix_eventversion_event_number",
+        "eventversion",
+        ["event_id", "version_number"],
+        unique=False,
+    )
@@ -0,0 +1,114 @@
+"""event version deltas
+
+Revision ID: c3a8f5d21e97
+Revises: b7d2e91c4a05
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8f5d21e97'
+down_revision: Union[str, None] = 'b7d2e91c4a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = ("title", "description", "start_time", "end_time", "location")
+
+
+def _encode(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _decode(field, value):
+    if field in ("start_time", "end_time") and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("event", sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+    with op.batch_alter_table("eventversion") as batch:
+        batch.add_column(sa.Column("is_keyframe", sa.Boolean(), nullable=False, server_default=sa.true()))
+        batch.add_column(sa.Column("delta", sa.JSON(), nullable=True))
+        batch.alter_column("title", existing_type=sa.String(), nullable=True)
+        batch.alter_column("start_time", existing_type=sa.DateTime(), nullable=True)
+        batch.alter_column("end_time", existing_type=sa.DateTime(), nullable=True)
+    op.create_index(
+        "ix_eventversion_event_number",
+        "eventversion",
+        ["event_id", "version_number"],
+        unique=False,
+    )
+
+    # Existing rows stay full snapshots (keyframes). Each one gets the delta
+    # to the next snapshot, or to the live event for the latest, so new
+    # delta rows can be replayed from them.
+    conn = op.get_bind()
+    events = {
+        row.id: row
+        for row in conn.execute(sa.text(
+            "SELECT id, title, description, start_time, end_time, location FROM event"
+        )).all()
+    }
+    versions = conn.execute(sa.text(
+        "SELECT id, event_id, version_number, title, description, start_time, end_time, location "
+        "FROM eventversion ORDER BY event_id, version_number, id"
+    )).all()
+    delta_type = sa.JSON()
+    for i, row in enumerate(versions):
+        following = versions[i + 1] if i + 1 < len(versions) and versions[i + 1].event_id == row.event_id else None
+        after = following or events.get(row.event_id)
+        if after is None:
+            continue
+        delta = {f: _encode(getattr(after, f)) for f in FIELDS if getattr(after, f) != getattr(row, f)}
+        conn.execute(
+            sa.text("UPDATE eventversion SET delta = :delta WHERE id = :id").bindparams(
+                sa.bindparam("delta", type_=delta_type)
+            ),
+            {"delta": delta, "id": row.id},
+        )
+        if following is None:
+            conn.execute(
+                sa.text("UPDATE event SET revision = :revision WHERE id = :id"),
+                {"revision": row.version_number, "id": row.event_id},
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # turn every delta row back into a full snapshot by replaying it
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, event_id, is_keyframe, delta, title, description, start_time, end_time, location "
+        "FROM eventversion ORDER BY event_id, version_number, id"
+    ).columns(delta=sa.JSON())).all()
+    event_id, state = None, None
+    for row in rows:
+        if row.is_keyframe or row.event_id != event_id:
+            event_id, state = row.event_id, {f: getattr(row, f) for f in FIELDS}
+        else:
+            conn.execute(
+                sa.text(
+                    "UPDATE eventversion SET title = :title, description = :description, "
+                    "start_time = :start_time, end_time = :end_time, location = :location WHERE id = :id"
+                ),
+                {**state, "id": row.id},
+            )
+        for f, value in (row.delta or {}).items():
+            state[f] = _decode(f, value)
+
+    op.drop_index("ix_eventversion_event_number", table_name="eventversion")
+    with op.batch_alter_table("eventversion") as batch:
+        batch.alter_column("end_time", existing_type=sa.DateTime(), nullable=False)
+        batch.alter_column("start_time", existing_type=sa.DateTime(), nullable=False)
+        batch.alter_column("title", existing_type=sa.String(), nullable=False)
+        batch.drop_column("delta")
+        batch.drop_column("is_keyframe")
+    op.drop_column("event", "revision")
@@ -0,0 +1,32 @@
+"""event end index
+
+Revision ID: c6f3a9e2d871
+Revises: b9e1d4a7c263
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f3a9e2d871'
+down_revision: Union[str, None] = 'b9e1d4a7c263'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_event_owner_end",
+        "event",
+        ["owner_id", "end_time", "start_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_event_owner_end", table_name="event")
@@ -0,0 +1,53 @@
+"""notification inbox
+
+Revision ID: d5f2a7c1e830
+Revises: c3a8f5d21e97
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2a7c1e830'
+down_revision: Union[str, None] = 'c3a8f5d21e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notification_user_created",
+        "notification",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notification_user_unread",
+        "notification",
+        ["user_id", "is_read", "created_at", "id"],
+        unique=False,
+    )
+    op.create_table(
+        "notificationcounter",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("unread", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # one COUNT, now, instead of one per badge poll from here on
+    op.execute(
+        "INSERT INTO notificationcounter (user_id, unread) "
+        "SELECT user_id, COUNT(*) FROM notification WHERE is_read = false GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("notificationcounter")
+    op.drop_index("ix_notification_user_unread", table_name="notification")
+    op.drop_index("ix_notification_user_created", table_name="notification")
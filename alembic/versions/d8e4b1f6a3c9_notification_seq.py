@@ -0,0 +1,52 @@
+"""notification seq
+
+Revision ID: d8e4b1f6a3c9
+Revises: c6f3a9e2d871
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e4b1f6a3c9'
+down_revision: Union[str, None] = 'c6f3a9e2d871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("notification", sa.Column("seq", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("notificationcounter", sa.Column("last_seq", sa.Integer(), nullable=False, server_default="0"))
+    # existing rows keep their order: seq starts out as the id
+    op.execute("UPDATE notification SET seq = id")
+    op.execute(
+        "UPDATE notificationcounter SET last_seq = COALESCE("
+        "(SELECT MAX(n.id) FROM notification n WHERE n.user_id = notificationcounter.user_id), 0)"
+    )
+    op.drop_index("ix_notification_user_id", table_name="notification")
+    op.create_index(
+        "ix_notification_user_seq",
+        "notification",
+        ["user_id", "seq"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notification_user_seq", table_name="notification")
+    op.create_index(
+        "ix_notification_user_id",
+        "notification",
+        ["user_id", "id"],
+        unique=False,
+    )
+    with op.batch_alter_table("notificationcounter") as batch:
+        batch.drop_column("last_seq")
+    with op.batch_alter_table("notification") as batch:
+        batch.drop_column("seq")
@@ -0,0 +1,34 @@
+"""event created_at
+
+Revision ID: e2b7c4a9d516
+Revises: d8e4b1f6a3c9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4a9d516'
+down_revision: Union[str, None] = 'd8e4b1f6a3c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("event", sa.Column("created_at", sa.DateTime(), nullable=True))
+    # existing rows only need to differ from events created from now on
+    op.execute(sa.text("UPDATE event SET created_at = :now").bindparams(now=datetime.utcnow()))
+    with op.batch_alter_table("event") as batch:
+        batch.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("event") as batch:
+        batch.drop_column("created_at")
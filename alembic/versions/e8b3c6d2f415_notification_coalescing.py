@@ -0,0 +1,51 @@
+"""notification coalescing
+
+Revision ID: e8b3c6d2f415
+Revises: d5f2a7c1e830
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c6d2f415'
+down_revision: Union[str, None] = 'd5f2a7c1e830'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("notification") as batch:
+        batch.add_column(sa.Column("kind", sa.String(), nullable=True))
+        batch.add_column(sa.Column("count", sa.Integer(), nullable=False, server_default="1"))
+        batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE notification SET updated_at = created_at")
+    with op.batch_alter_table("notification") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_notification_coalesce",
+        "notification",
+        ["user_id", "event_id", "kind", "is_read"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notification_read_updated",
+        "notification",
+        ["is_read", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notification_read_updated", table_name="notification")
+    op.drop_index("ix_notification_coalesce", table_name="notification")
+    with op.batch_alter_table("notification") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("count")
+        batch.drop_column("kind")
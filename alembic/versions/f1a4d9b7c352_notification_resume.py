@@ -0,0 +1,36 @@
+"""notification resume
+
+Revision ID: f1a4d9b7c352
+Revises: e8b3c6d2f415
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a4d9b7c352'
+down_revision: Union[str, None] = 'e8b3c6d2f415'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("outboxmessage", sa.Column("notification_ids", sa.JSON(), nullable=True))
+    op.create_index(
+        "ix_notification_user_id",
+        "notification",
+        ["user_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notification_user_id", table_name="notification")
+    with op.batch_alter_table("outboxmessage") as batch:
+        batch.drop_column("notification_ids")
@@ -0,0 +1,54 @@
+"""event recurrence end
+
+Revision ID: f4c0747f46ef
+Revises: 03da07a8b134
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.recurrence import series_end_for
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c0747f46ef'
+down_revision: Union[str, None] = '03da07a8b134'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("event", sa.Column("recurrence_end", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_event_owner_recurring",
+        "event",
+        ["owner_id", "is_recurring", "recurrence_end"],
+        unique=False,
+    )
+
+    # backfill existing series; unparseable patterns stay one-off
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, start_time, end_time, recurrence_pattern FROM event "
+        "WHERE is_recurring AND recurrence_pattern IS NOT NULL"
+    )).all()
+    for row in rows:
+        try:
+            end = series_end_for(row.start_time, row.end_time, True, row.recurrence_pattern)
+        except ValueError:
+            continue
+        if end is not None:
+            conn.execute(
+                sa.text("UPDATE event SET recurrence_end = :end WHERE id = :id"),
+                {"end": end, "id": row.id},
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_event_owner_recurring", table_name="event")
+    op.drop_column("event", "recurrence_end")
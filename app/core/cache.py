@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU mapping whose entries also expire `ttl` seconds after
+    being stored. `ttl=None` keeps entries until they are evicted.
+
+    With a `group` function, keys are also indexed by `group(key)` so
+    `pop_groups` drops a whole group without scanning the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None, group=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._group = group
+        self._groups: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or (item[0] is not None and item[0] <= now):
+                if item is not None:
+                    self._forget(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float | None = MISSING):
+        ttl = self.ttl if ttl is MISSING else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            if self._group is not None:
+                self._groups.setdefault(self._group(key), set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._forget(next(iter(self._data)))
+
+    def pop(self, key):
+        with self._lock:
+            self._forget(key)
+
+    def pop_groups(self, groups):
+        """Drop every key in `groups`; costs the keys dropped, not the cache size."""
+        with self._lock:
+            for group in groups:
+                for key in self._groups.pop(group, ()):
+                    self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+
+    def _forget(self, key):
+        # caller holds the lock
+        if self._data.pop(key, None) is None or self._group is None:
+            return
+        group = self._group(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def __len__(self):
+        return len(self._data)
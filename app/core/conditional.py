@@ -0,0 +1,49 @@
+from fastapi import Request, Response, status
+
+from app.core.negotiation import wants_msgpack
+
+# versions and diffs never change once written
+IMMUTABLE = "private, max-age=31536000, immutable"
+# live resources may be cached but must be revalidated every time
+REVALIDATE = "private, no-cache"
+
+
+def _tags(header: str | None) -> set[str] | None:
+    """Opaque tags of an If-None-Match header, or None for `*`."""
+    if header is None:
+        return set()
+    if header.strip() == "*":
+        return None
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def weak_etag(*parts) -> str:
+    """Weak validator, for resources whose representation may vary (e.g. by format)."""
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def strong_etag(*parts) -> str:
+    """Strong validator for byte-identical responses; the wire format is part of it."""
+    parts = (*parts, "msgpack" if wants_msgpack() else "json")
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def none_match(request: Request, etag: str) -> bool:
+    """True if If-None-Match lists `etag` (weak comparison), i.e. answer 304."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = _tags(header)
+    return tags is None or etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept"},
+    )
+
+
+def set_validators(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -1,13 +1,90 @@
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, echo=True)
 
-def get_session():
-    with Session(engine) as session:
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# asyncpg prepared statements cached per connection; 0 disables (needed behind pgbouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# Async drivers for the plain URLs used by Alembic and the README
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str):
+    """`DATABASE_URL` rewritten to the matching async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if url.drivername in ASYNC_DRIVERS.values() or backend not in ASYNC_DRIVERS:
+        return url
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def _engine_options(url) -> dict:
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite keeps one connection per checkout; pool sizing does not apply
+        return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if url.drivername == "postgresql+asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+_url = async_url(DATABASE_URL)
+engine = create_async_engine(_url, **_engine_options(_url))
+
+# expire_on_commit=False: attributes stay loaded after commit, so responses
+# never trigger an implicit (and, under asyncio, illegal) refresh
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_session():
+    async with async_session() as session:
         yield session
 
+
+def upsert(session: AsyncSession, table):
+    """
+    INSERT for the session's backend with `.on_conflict_do_update()` /
+    `.on_conflict_do_nothing()` available (PostgreSQL and SQLite).
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+async def insert_ids(session: AsyncSession, model, rows: list[dict]) -> list[int]:
+    """
+    Bulk INSERT `rows` and return their new ids in row order.
+
+    PostgreSQL batches INSERT .. RETURNING sorted by parameter order. SQLite
+    cannot sort it, and SQLAlchemy would fall back to a statement per row;
+    there each batch assigns ascending rowids in VALUES order instead, so
+    the unsorted ids are put in order afterwards.
+    """
+    if session.bind.dialect.name == "sqlite":
+        return sorted((await session.scalars(insert(model).returning(model.id), rows)).all())
+    return list((await session.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows
+    )).all())
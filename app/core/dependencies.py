@@ -1,10 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from app.core.database import get_session
-from app.models.user import User
-from sqlmodel import Session
+from app.core.cache import MISSING, TTLCache
+from app.core.database import async_session, get_session
+from app.models.user import RoleEnum, User
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import NamedTuple
 import os
+import time
 
 # Change this to HTTPBearer
 auth_scheme = HTTPBearer()
@@ -12,26 +15,127 @@ auth_scheme = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
-def get_current_user(
-    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    session: Session = Depends(get_session)
-) -> User:
+# Changes made through the app drop the cached principal at once on the
+# worker that made them (invalidate_user); other workers, and edits made
+# straight in the database, are seen once the cached principal expires
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "100000"))
+
+
+class Principal(NamedTuple):
+    """The authenticated user, as much of it as routes need."""
+    id: int
+    username: str
+    email: str
+    role: RoleEnum
+    is_active: bool
+
+
+# token -> user id, kept until the token's own expiry
+_claims_cache = TTLCache(AUTH_CACHE_SIZE)
+# revoked token -> True, also kept until the token's expiry
+_revoked_tokens = TTLCache(AUTH_CACHE_SIZE)
+# user id -> Principal
+_principal_cache = TTLCache(AUTH_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def _token_user_id(token: str) -> int | None:
+    """Verify a JWT once and remember its subject until it expires."""
+    if _revoked_tokens.get(token, None):
+        return None
+    user_id = _claims_cache.get(token)
+    if user_id is not MISSING:
+        return user_id
     try:
-        # token.credentials instead of raw string
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
+    except (JWTError, ValueError, TypeError):
+        return None
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        _claims_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+async def _load_principal(session: AsyncSession, user_id: int) -> Principal | None:
+    principal = _principal_cache.get(user_id)
+    if principal is not MISSING:
+        return principal
+    user = await session.get(User, user_id)
+    principal = Principal(user.id, user.username, user.email, user.role, user.is_active) if user else None
+    _principal_cache.set(user_id, principal)
+    return principal
+
+
+def revoke_token(token: str):
+    """
+    Reject `token` from now on, e.g. on logout.
+
+    Revocation is kept in this process only: other workers accept the
+    token until it expires. Deactivating the user (invalidate_user) is what
+    locks an account out everywhere, within PRINCIPAL_CACHE_TTL.
+    """
+    try:
+        claims = jwt.get_unverified_claims(token)
+        ttl = max(claims.get("exp", 0) - time.time(), 1)
+    except JWTError:
+        return
+    _revoked_tokens.set(token, True, ttl=ttl)
+    _claims_cache.pop(token)
+
+
+def invalidate_user(user_id: int):
+    """Drop the cached principal; call after committing a change to a user's is_active or role."""
+    _principal_cache.pop(user_id)
+
+
+async def get_current_user_id(
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+) -> int:
+    """
+    Authenticated user id straight from the (cached) token, without a DB
+    query. Users known to be deactivated are still rejected.
+    """
+    user_id = _token_user_id(token.credentials)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+    principal = _principal_cache.get(user_id, None)
+    if principal is not None and not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+        )
+    return user_id
+
+
+async def get_current_user(
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    session: AsyncSession = Depends(get_session)
+) -> Principal:
+    """
+    Authenticated principal; only a cache miss costs a `User` lookup.
+    """
+    user_id = _token_user_id(token.credentials)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
 
-    user = session.get(User, user_id)
+    user = await _load_principal(session, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+        )
     return user
 
 
@@ -39,48 +143,33 @@ def get_current_user(
 
 # ——— HTTP Bearer scheme (for both HTTP & WS) ———
 
-def get_current_user_http(
-    credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    session: Session = Depends(get_session),
-) -> User:
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-        )
-
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-        )
-    return user
+get_current_user_http = get_current_user
 
 # ——— WebSocket–specific dependency ———
 # (WebSocket doesn't natively support Depends in the same way,
-# so we'll manually pull the Authorization header from the scope)
-async def get_current_user_ws(websocket) -> User:
+# so we'll manually pull the token from the Authorization header;
+# never from the query string, which ends up in access logs)
+async def get_current_user_ws(websocket) -> Principal:
     auth: str = websocket.headers.get("authorization")
-    if not auth or not auth.lower().startswith("bearer "):
+    token = None
+    if auth and auth.lower().startswith("bearer "):
+        token = auth.split(" ", 1)[1]
+    if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return  # never reaches beyond this
 
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
+    user_id = _token_user_id(token)
+    if user_id is None:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    # reuse your DB session
-    session = next(get_session())
-    user = session.get(User, user_id)
-    if not user:
+    # short-lived session, only opened on a cache miss
+    user = _principal_cache.get(user_id)
+    if user is MISSING:
+        async with async_session() as session:
+            user = await _load_principal(session, user_id)
+    if not user or not user.is_active:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    return user
\ No newline at end of file
+    return user
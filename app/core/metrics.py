@@ -0,0 +1,236 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Statements slower than this are logged with the request path; 0 disables
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# seconds; Prometheus' default buckets stretched down for sub-millisecond work
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, k)} {v}" for k, v in self.values.items()]
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. `observe` is a bisect and a few additions
+    per call; buckets are only accumulated when rendered.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in self.values.items():
+            names = self.labels + ("le",)
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                lines.append(f"{self.name}_bucket{_labels(names, key + (bound,))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {total}")
+        return lines
+
+
+class Gauge:
+    """A value read from `fn` at scrape time, so nothing is tracked in between."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        self.name, self.help, self.fn, self.kind = name, help, fn, kind
+
+    def render(self) -> list[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value}"]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.add(Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+http_latency = registry.add(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.",
+    ("method", "route")))
+request_queries = registry.add(Histogram(
+    "http_request_db_queries", "SQL statements issued while serving one request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS))
+request_db_time = registry.add(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements while serving one request.",
+    ("method", "route")))
+db_queries = registry.add(Counter(
+    "db_queries_total", "SQL statements executed, background tasks included."))
+db_time = registry.add(Counter(
+    "db_query_seconds_total", "Time spent executing SQL statements, background tasks included."))
+slow_queries = registry.add(Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS."))
+
+
+class RequestStats:
+    """SQL accounting of the request being served (see `current`)."""
+
+    __slots__ = ("path", "queries", "db_seconds")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# set by MetricsMiddleware; background tasks see None and only count globally
+current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries.inc()
+    db_time.inc(amount=elapsed)
+    stats = current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc()
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s", elapsed * 1000,
+            stats.path if stats is not None else "background", " ".join(statement.split())[:1000],
+        )
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    """Count and time every statement of `engine` (an AsyncEngine or Engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    pool = sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        registry.add(Gauge("db_pool_checked_out", "Connections currently checked out of the pool.",
+                           pool.checkedout))
+
+
+def instrument_dispatcher(dispatcher):
+    """Expose the WebSocket dispatcher's counters as gauges read at scrape time."""
+    for key, name, help, kind in (
+        ("connections", "ws_connections", "Open notification WebSockets.", "gauge"),
+        ("users", "ws_users", "Users with at least one open WebSocket.", "gauge"),
+        ("queue_depth", "ws_queue_depth", "Messages waiting in all send queues.", "gauge"),
+        ("max_queue_depth", "ws_max_queue_depth", "Messages waiting in the fullest send queue.", "gauge"),
+        ("sent", "ws_messages_sent_total", "Messages written to WebSockets.", "counter"),
+        ("dropped", "ws_messages_dropped_total", "Messages dropped from full send queues.", "counter"),
+        ("disconnected", "ws_slow_disconnects_total", "Sockets closed for not keeping up.", "counter"),
+    ):
+        registry.add(Gauge(name, help, lambda key=key: dispatcher.stats()[key], kind))
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    # unmatched paths share one label, so scanners cannot blow up the series count
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Per-request latency, status and SQL accounting, labelled by route
+    template (`/api/events/{event_id}`, not the raw path).
+
+    A plain ASGI middleware: streamed bodies are timed to their last chunk
+    and nothing is buffered. WebSocket and lifespan traffic passes through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope["path"])
+        token = current.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current.reset(token)
+            method, route = scope["method"], _route(scope)
+            http_requests.inc(method, route, status_code)
+            http_latency.observe(elapsed, method, route)
+            request_queries.observe(stats.queries, method, route)
+            request_db_time.observe(stats.db_seconds, method, route)
@@ -0,0 +1,102 @@
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Callable
+
+import msgpack
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# set per request by NegotiatedRoute, read when the response is rendered
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def _quality(accept: str, media_types) -> float:
+    best = 0.0
+    for item in accept.split(","):
+        media_type, *params = [p.strip() for p in item.split(";")]
+        if media_type.lower() not in media_types:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best = max(best, q)
+    return best
+
+
+def prefers_msgpack(accept: str | None) -> bool:
+    """True if the Accept header ranks MessagePack above JSON."""
+    if not accept:
+        return False
+    return _quality(accept, MSGPACK_TYPES) > _quality(accept, ("application/json", "*/*", "application/*"))
+
+
+def wants_msgpack() -> bool:
+    """Whether the current request negotiated a MessagePack response."""
+    return _wants_msgpack.get()
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def packb(content) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+class NegotiatedResponse(ORJSONResponse):
+    """orjson by default, MessagePack when the request asked for it."""
+
+    def __init__(self, content=None, *args, **kwargs):
+        if wants_msgpack():
+            self.media_type = MSGPACK
+        super().__init__(content, *args, **kwargs)
+        self.headers.setdefault("vary", "Accept")
+
+    def render(self, content) -> bytes:
+        if self.media_type == MSGPACK:
+            return packb(content)
+        return super().render(content)
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    Accepts `application/msgpack` request bodies and records whether the
+    client prefers a MessagePack response, for NegotiatedResponse.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in MSGPACK_TYPES:
+                body = await request.body()
+                try:
+                    data = msgpack.unpackb(body, raw=False) if body else None
+                except (msgpack.UnpackException, ValueError):
+                    raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid MessagePack body")
+                # FastAPI only parses JSON bodies; hand it the decoded value as one
+                headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+                headers.append((b"content-type", b"application/json"))
+                request = Request({**request.scope, "headers": headers}, request.receive)
+                request._body = body
+                request._json = data
+
+            token = _wants_msgpack.set(prefers_msgpack(request.headers.get("accept")))
+            try:
+                return await handler(request)
+            finally:
+                _wants_msgpack.reset(token)
+
+        return negotiated_handler
@@ -0,0 +1,166 @@
+import logging
+import os
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, NamedTuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# "off" (default), "header": add X-Query-* headers to every response and log
+# budget violations, "log": only log violations. Development and tests only.
+QUERY_GUARD = os.getenv("QUERY_GUARD", "off")
+# Default per-request budget: total statements, and repeats of one normalized statement
+QUERY_GUARD_MAX_QUERIES = int(os.getenv("QUERY_GUARD_MAX_QUERIES", "25"))
+QUERY_GUARD_MAX_REPEATS = int(os.getenv("QUERY_GUARD_MAX_REPEATS", "3"))
+
+# a placeholder after `_PLACEHOLDERS`, with asyncpg's optional cast
+_PLACEHOLDER = r"\?(?:::\w+(?:\[\])?)?"
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|%s")
+# IN (?, ?, ?) and multi-row VALUES (?, ?), (?, ?) differ only in input size
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """
+    SQL with placeholders unified and placeholder lists collapsed, so the
+    same query for 1 or 500 ids (or rows) groups together.
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _ROW_LIST.sub("(...)", sql)
+
+
+class Budget(NamedTuple):
+    max_queries: int = QUERY_GUARD_MAX_QUERIES
+    max_repeats: int = QUERY_GUARD_MAX_REPEATS
+
+
+class Report:
+    """The statements one request issued, grouped by normalized SQL."""
+
+    __slots__ = ("method", "path", "route", "statements", "budget")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route: str | None = None
+        self.statements: Counter[str] = Counter()
+        self.budget = Budget()
+
+    @property
+    def total(self) -> int:
+        return sum(self.statements.values())
+
+    @property
+    def max_repeats(self) -> int:
+        return max(self.statements.values(), default=0)
+
+    def violations(self) -> list[str]:
+        found = []
+        if self.total > self.budget.max_queries:
+            found.append(f"{self.total} statements, budget {self.budget.max_queries}")
+        for sql, count in self.statements.most_common():
+            if count <= self.budget.max_repeats:
+                break
+            found.append(f"{count}x {sql[:300]}")
+        return found
+
+    def __str__(self) -> str:
+        lines = [f"{self.method} {self.route or self.path}: {self.total} statements"]
+        lines += [f"  {count:>4}x {sql[:300]}" for sql, count in self.statements.most_common()]
+        return "\n".join(lines)
+
+
+class QueryGuard:
+    """
+    Records the statements each HTTP request issues and checks them against
+    a per-route budget (see `budget`).
+
+    A statement repeated more than `max_repeats` times in one request is the
+    usual N+1 signature: one query per item of the payload or result. An
+    executemany counts once, so set-based routes stay flat however large
+    their input. Listeners (the pytest fixture) receive every report.
+    """
+
+    def __init__(self, mode: str = QUERY_GUARD):
+        if mode not in ("off", "header", "log"):
+            raise ValueError(f"Unknown query guard mode: {mode}")
+        self.mode = mode
+        self.budgets: dict[tuple[str, str], Budget] = {}
+        self.listeners: list[Callable[[Report], None]] = []
+        self.current: ContextVar[Report | None] = ContextVar("query_report", default=None)
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off" or bool(self.listeners)
+
+    def budget(self, method: str, route: str, max_queries: int = QUERY_GUARD_MAX_QUERIES,
+               max_repeats: int = QUERY_GUARD_MAX_REPEATS):
+        """Override the budget of one route, by method and path template."""
+        self.budgets[(method.upper(), route)] = Budget(max_queries, max_repeats)
+
+    def instrument(self, engine):
+        event.listen(getattr(engine, "sync_engine", engine), "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        report = self.current.get()
+        if report is not None:
+            report.statements[normalize(statement)] += 1
+
+    def finish(self, report: Report, route: str | None):
+        report.route = route
+        report.budget = self.budgets.get((report.method, route), Budget())
+        violations = report.violations()
+        if violations and self.mode != "off":
+            logger.warning("Query budget exceeded by %s %s: %s", report.method, route or report.path,
+                           "; ".join(violations))
+        for listener in list(self.listeners):
+            listener(report)
+
+
+guard = QueryGuard()
+
+
+class QueryGuardMiddleware:
+    """
+    Opens a `Report` per HTTP request while the guard is active. In
+    "header" mode the response carries X-Query-Count, X-Query-Max-Repeats
+    and, when over budget, X-Query-Budget: exceeded.
+
+    Headers go out before a streamed body is produced, so they count the
+    statements issued up to that point; the logged report covers the whole
+    request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not guard.active:
+            return await self.app(scope, receive, send)
+        report = Report(scope["method"], scope["path"])
+        token = guard.current.set(report)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and guard.mode == "header":
+                report.route = getattr(scope.get("route"), "path", None)
+                report.budget = guard.budgets.get((report.method, report.route), Budget())
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(report.total).encode()))
+                headers.append((b"x-query-max-repeats", str(report.max_repeats).encode()))
+                if report.violations():
+                    headers.append((b"x-query-budget", b"exceeded"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            guard.current.reset(token)
+            guard.finish(report, getattr(scope.get("route"), "path", None))
@@ -1,12 +1,24 @@
+import asyncio
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from jose import jwt
 from dotenv import load_dotenv
 
 load_dotenv()  # Load .env file
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost are re-hashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 runs bcrypt on the shared threadpool instead of a dedicated process pool
+BCRYPT_POOL_SIZE = int(os.getenv("BCRYPT_POOL_SIZE", str(min(2, os.cpu_count() or 1))))
+# Hash/verify jobs allowed to wait for a worker before new ones are refused
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Load secrets
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -19,6 +31,71 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify, also returning a re-hash when the stored cost is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HasherBusy(Exception):
+    """Raised when the password hasher already has too much queued work."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in its own small process pool so a burst of logins cannot
+    occupy the threadpool that serves every other endpoint.
+
+    At most `max_pending` jobs are admitted at once (running or queued);
+    beyond that `HasherBusy` is raised instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int = BCRYPT_POOL_SIZE, max_pending: int = BCRYPT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.wrap_future(self._executor().submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        return await self._run(verify_and_update, password, hashed)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+hasher = PasswordHasher()
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
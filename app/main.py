@@ -1,8 +1,18 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.routers import auth
 from app.routers import events
+from app.routers import notifications
+from app.routers import metrics
 # from app.models.user import User
 from app.core.database import engine
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware, instrument_dispatcher, instrument_engine
+from app.core.query_guard import QueryGuardMiddleware, guard
+from app.core.security import hasher
+from app.services import broker
+from app.services.dispatcher import dispatcher
+from app.services.outbox import drainer
+from app.services.retention import purger
 from sqlmodel import SQLModel
 
 from fastapi import FastAPI
@@ -42,6 +52,7 @@ This API allows users to create, update, and share events with:
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     swagger_ui_parameters={
         "docExpansion": "none",
         "defaultModelsExpandDepth": -1,
@@ -52,9 +63,32 @@ This API allows users to create, update, and share events with:
 
 
 @app.on_event("startup")
-def on_startup():
-    SQLModel.metadata.create_all(engine)
+async def on_startup():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    await broker.start()
+    drainer.start()
+    purger.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await purger.stop()
+    await drainer.stop()
+    await broker.stop()
+    hasher.shutdown()
+    await engine.dispose()
 
 app.include_router(auth.router)
 app.include_router(events.router)
+app.include_router(notifications.router)
+
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    instrument_dispatcher(dispatcher)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
+# a pass-through unless QUERY_GUARD is set or the pytest fixture is listening
+guard.instrument(engine)
+app.add_middleware(QueryGuardMiddleware)
 
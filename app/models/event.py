@@ -1,9 +1,22 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
+from sqlalchemy.orm import declared_attr
 from typing import Optional, List
 from datetime import datetime
 from app.models.user import User
 
 class Event(SQLModel, table=True):
+    __table_args__ = (
+        # conflict checks range-scan this per owner
+        Index("ix_event_owner_start_end", "owner_id", "start_time", "end_time"),
+        # ...or from the other end: the owner's events ending after a time
+        Index("ix_event_owner_end", "owner_id", "end_time", "start_time"),
+        # recurring series are checked separately from one-off events; keyed on
+        # start_time so planners don't fall back to ix_event_owner_start_end, which
+        # walks every earlier one-off event of the owner
+        Index("ix_event_owner_series", "owner_id", "is_recurring", "start_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -12,5 +25,17 @@ class Event(SQLModel, table=True):
     location: Optional[str] = None
     is_recurring: bool = False
     recurrence_pattern: Optional[str] = None # e.g. 'daily', 'weekly', 'custom json'
+    recurrence_end: Optional[datetime] = None # end of the last occurrence, None = never ends
     owner_id: int = Field(foreign_key="user.id")
+    revision: int = 0 # number of recorded versions, see app/services/history.py
+    # part of strong ETags: ids can be reused after a delete, creation times can't
+    # (the column default also covers bulk inserts that don't set it)
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"default": datetime.utcnow})
     owner: Optional["User"] = Relationship(back_populates="events")
+
+    @declared_attr
+    def __mapper_args__(cls):
+        # optimistic concurrency: every ORM UPDATE carries WHERE revision = <the
+        # revision it was loaded at> and raises StaleDataError when another
+        # transaction got there first; record_version sets the next value
+        return {"version_id_col": cls.__table__.c.revision, "version_id_generator": False}
@@ -1,11 +1,38 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from datetime import datetime
 
 class Notification(SQLModel, table=True):
+    __table_args__ = (
+        # inbox pages, newest first, and the unread-only view of it
+        Index("ix_notification_user_created", "user_id", "created_at", "id"),
+        Index("ix_notification_user_unread", "user_id", "is_read", "created_at", "id"),
+        # WebSocket resume: a user's rows changed after the last seq they saw
+        Index("ix_notification_user_seq", "user_id", "seq"),
+        # unread rows a new notification may be coalesced into
+        Index("ix_notification_coalesce", "user_id", "event_id", "kind", "is_read"),
+        # retention purge of old read rows
+        Index("ix_notification_read_updated", "is_read", "updated_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     event_id: Optional[int] = Field(foreign_key="event.id")
+    kind: Optional[str] = None  # outbox kind, e.g. 'event_updated'
     message: str
+    count: int = 1  # notifications coalesced into this row
+    seq: int = 0  # position in the user's WebSocket feed, moved forward by every merge
     is_read: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)  # latest coalesced one
+
+
+class NotificationCounter(SQLModel, table=True):
+    """
+    Unread notifications per user, kept in step with `Notification` in the
+    same transactions that insert or mark rows, so badges never need a COUNT.
+    """
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    unread: int = 0
+    last_seq: int = 0  # latest Notification.seq handed out to this user
@@ -0,0 +1,28 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field, Column, JSON
+from sqlalchemy import Index
+from datetime import datetime
+
+class OutboxMessage(SQLModel, table=True):
+    """
+    A notification fan-out written in the same transaction as the domain
+    change. The outbox drainer turns it into `Notification` rows and
+    WebSocket pushes after commit, then deletes it.
+    """
+    __table_args__ = (
+        Index("ix_outboxmessage_pending", "persisted_at", "available_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # websocket payload "type", e.g. 'event_updated'
+    event_id: Optional[int] = None
+    recipients: list[int] = Field(sa_column=Column(JSON, nullable=False))
+    message: str
+    payload: dict = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    attempts: int = 0
+    last_error: Optional[str] = None
+    persisted_at: Optional[datetime] = None
+    # {recipient user id: id of the Notification row it landed in}, filled in when persisted
+    notification_ids: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
@@ -1,10 +1,18 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 from app.models.user import User
 from app.models.event import Event
 from app.models.user import RoleEnum
 
 class EventPermission(SQLModel, table=True):
+    __table_args__ = (
+        # "events shared with me" lookups
+        Index("ix_eventpermission_user_event", "user_id", "event_id"),
+        # one role per user and event; the ON CONFLICT target of sharing
+        Index("ux_eventpermission_event_user", "event_id", "user_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="event.id")
     user_id: int = Field(foreign_key="user.id")
@@ -1,16 +1,26 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Column, JSON
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 class EventVersion(SQLModel, table=True):
+    __table_args__ = (
+        # version lookups replay a short version_number range per event; unique,
+        # so two writers can never both record the same version of an event
+        Index("ux_eventversion_event_number", "event_id", "version_number", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="event.id")
     version_number: int
-    title: str
+    # snapshot fields are only stored on keyframes, see app/services/history.py
+    is_keyframe: bool = True
+    title: Optional[str] = None
     description: Optional[str] = None
-    start_time: datetime
-    end_time: datetime
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
     location: Optional[str] = None
+    # fields changed by the update that followed this version
+    delta: Optional[dict] = Field(default=None, sa_column=Column(JSON))
     updated_by: int = Field(foreign_key="user.id")
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-
@@ -1,31 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemas.user import UserCreate, UserRead, Token
 from app.models.user import User
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import HasherBusy, hasher, create_access_token
 from app.core.database import get_session
+from app.core.dependencies import auth_scheme, get_current_user_id, invalidate_user, revoke_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+
+def _busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent logins, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserRead)
-def register(user: UserCreate, session: Session = Depends(get_session)):
-    hashed = hash_password(user.password)
+async def register(user: UserCreate, session: AsyncSession = Depends(get_session)):
+    try:
+        hashed = await hasher.hash(user.password)
+    except HasherBusy:
+        raise _busy()
     db_user = User(username=user.username, email=user.email, hashed_password=hashed)
     try:
         session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
+        await session.commit()
+        await session.refresh(db_user)
         return db_user
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Username or email already exists")
 
 @router.post("/login", response_model=Token)
-def login(user: UserCreate, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.username == user.username)).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserCreate, session: AsyncSession = Depends(get_session)):
+    db_user = (await session.exec(select(User).where(User.username == user.username))).first()
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
+    try:
+        valid, new_hash = await hasher.verify_and_update(user.password, db_user.hashed_password)
+    except HasherBusy:
+        raise _busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
+
     token = create_access_token(data={"sub": str(db_user.id)})
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_id: int = Depends(get_current_user_id),
+):
+    revoke_token(token.credentials)
+
+
+@router.post("/deactivate", status_code=status.HTTP_204_NO_CONTENT)
+async def deactivate(
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_session),
+):
+    user = await session.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.is_active = False
+    session.add(user)
+    await session.commit()
+    # this worker rejects the user at once, the others within PRINCIPAL_CACHE_TTL
+    invalidate_user(user_id)
+    revoke_token(token.credentials)
@@ -1,544 +1,1098 @@
 from typing import List
-from app.models.notification import Notification
-from app.routers.notifications import notify_user
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.schemas.event import EventCreate, EventRead, EventUpdate, EventBatchCreate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.schemas.event import EventCreate, EventRead, EventUpdate, EventBatchCreate, EventBatchUpdate, EventBatchDelete, EventPage, EventOccurrence, FreeBusyRead, naive_utc
 from app.models.event import Event
-from app.models.user import User
-from app.core.database import get_session
+from app.models.user import RoleEnum, User
+from app.core.database import async_session, get_session, insert_ids, upsert
 from app.core.dependencies import get_current_user
+from app.core.conditional import IMMUTABLE, REVALIDATE, none_match, not_modified, set_validators, strong_etag, weak_etag
+from app.core.negotiation import MSGPACK, NegotiatedResponse, NegotiatedRoute, packb, wants_msgpack
 from app.models.permission import EventPermission
+from app.models.notification import Notification
+from app.models.outbox import OutboxMessage
 from app.models.version import EventVersion
 from app.schemas.version import EventVersionRead
-from app.schemas.permission import ShareUserPermission, PermissionRead
-from app.services.diff import diff_versions
-from sqlalchemy import and_
-from datetime import datetime
+from app.schemas.permission import ShareUserPermission, PermissionRead, ShareEventsRequest, ShareEventsResult
+from app.services.diff import diff_cache, diff_versions
+from app.core.cache import MISSING
+from app.services import freebusy, history, outbox
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.permissions import EDITORS, OWNER, VIEWERS, require_role, resolver
+from app.services.recurrence import occurrences, parse_rule, series_end_for
+from app.services.conflicts import find_batch_conflicts, find_conflicts, track_event, untrack_event
+from sqlalchemy import and_, delete, or_, tuple_, union, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import datetime, timedelta
+from itertools import islice
+import asyncio
+import heapq
+import os
+import random
+
+
+
+# Times an update that lost a race to a concurrent one is re-applied before 409
+EVENT_UPDATE_RETRIES = int(os.getenv("EVENT_UPDATE_RETRIES", "5"))
+# Base of the jittered, doubling pause between those attempts
+EVENT_UPDATE_BACKOFF_SECONDS = float(os.getenv("EVENT_UPDATE_BACKOFF_SECONDS", "0.005"))
+
+router = APIRouter(
+    prefix="/api/events",
+    tags=["events"],
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse,
+)
+
+
+async def check_conflict(session: AsyncSession, owner_id: int, start_time: datetime, end_time: datetime, exclude_event_id: int | None = None,
+                   recurrence_pattern: str | None = None):
+    """
+    Raise 409 listing every event of the owner overlapping [start_time, end_time]
+    (or any occurrence of the series, when a recurrence pattern is given).
+    """
+    conflicts = await find_conflicts(session, owner_id, start_time, end_time, exclude_event_id, recurrence_pattern)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Time conflict with existing events",
+                "conflicts": [
+                    {
+                        "event_id": c.id,
+                        "title": c.title,
+                        "start_time": c.start_time.isoformat(),
+                        "end_time": c.end_time.isoformat(),
+                    }
+                    for c in conflicts
+                ],
+            },
+        )
+
 
 
+def _event_etag(event_id: int, revision: int | None) -> str:
+    # revision is bumped by every update and rollback, together with its version row
+    return weak_etag(event_id, revision or 0)
 
-router = APIRouter(prefix="/api/events", tags=["events"])
 
+async def _revision(session: AsyncSession, event_id: int) -> int | None:
+    """The event's revision alone, without loading the row."""
+    return (await session.exec(select(Event.revision).where(Event.id == event_id))).first()
 
-def check_conflict(session: Session, owner_id: int, start_time: datetime, end_time: datetime, exclude_event_id: int | None = None):
+
+async def _incarnation(session: AsyncSession, event_id: int) -> str:
     """
-    Raise 409 if the owner already has an event overlapping [start_time, end_time].
+    Tells this event apart from an earlier one deleted under the same id
+    (SQLite reuses rowids), for immutable ETags and cached diffs.
     """
-    query = select(Event).where(
-        Event.owner_id == owner_id,
-        Event.start_time < end_time,
-        Event.end_time > start_time,
-    )
-    if exclude_event_id is not None:
-        query = query.where(Event.id != exclude_event_id)
+    created_at = (await session.exec(select(Event.created_at).where(Event.id == event_id))).first()
+    if created_at is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return created_at.strftime("%Y%m%d%H%M%S%f")
 
-    conflict = session.exec(query).first()
-    if conflict:
+
+def _expected_revision(request: Request, event_id: int, expected_revision: int | None) -> int | None:
+    """
+    The revision a write is conditional on: `expected_revision`, else the
+    one in If-Match (an ETag of this event). None when unconditional; -1
+    when If-Match names no revision of this event, so it can never match.
+    """
+    if expected_revision is not None:
+        return expected_revision
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    for tag in header.split(","):
+        prefix, _, revision = tag.strip().removeprefix("W/").strip('"').rpartition("-")
+        if prefix == str(event_id) and revision.isdigit():
+            return int(revision)
+    return -1
+
+
+async def _check_revision(session: AsyncSession, event: Event, expected: int | None,
+                          fields: set[str] = frozenset(), merge: bool = False):
+    """
+    Raise 412 unless `event` is still at the `expected` revision. With
+    `merge`, a newer event passes as long as none of `fields` changed since.
+    """
+    if expected is None or event.revision == expected:
+        return
+    headers = {"ETag": _event_etag(event.id, event.revision)}
+    if merge and 0 <= expected < event.revision:
+        clashing = await history.changed_since(session, event.id, expected) & fields
+        if not clashing:
+            return
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Time conflict with event: {conflict.title}, event ID {conflict.id},"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail={"message": "Fields changed concurrently", "fields": sorted(clashing)},
+            headers=headers,
+        )
+    raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED,
+                        detail="Resource has changed", headers=headers)
+
+
+async def _committed(session: AsyncSession) -> bool:
+    """
+    Commit, or roll back and return False when a concurrent write to the
+    same event got there first: the revision check on the event row failed,
+    or the version number was just taken.
+    """
+    try:
+        await session.commit()
+    except StaleDataError:
+        await session.rollback()
+        return False
+    except IntegrityError as error:
+        await session.rollback()
+        if not _version_taken(error):
+            raise
+        return False
+    return True
+
+
+def _version_taken(error: IntegrityError) -> bool:
+    """Whether `error` is a concurrent write taking the version number this one recorded."""
+    message = str(error.orig)
+    # PostgreSQL names the index, SQLite lists its columns
+    return ("ux_eventversion_event_number" in message
+            or "eventversion.event_id, eventversion.version_number" in message)
+
+
+async def _backoff(attempt: int):
+    """Jittered pause before re-applying a write, so racing writers spread out."""
+    await asyncio.sleep(random.uniform(0, EVENT_UPDATE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _busy(event_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "Event is being changed concurrently, try again", "event_id": event_id},
+    )
+
+
+def _pattern(event) -> str | None:
+    """The recurrence pattern that applies to an event, if it recurs at all."""
+    return event.recurrence_pattern if event.is_recurring else None
+
+
+def _set_recurrence_end(event: Event):
+    try:
+        event.recurrence_end = series_end_for(
+            event.start_time, event.end_time, event.is_recurring, event.recurrence_pattern
+        )
+    except (ValueError, OverflowError):
+        # legacy free-text pattern (treated as one-off) or a series ending after year 9999
+        event.recurrence_end = None
+
+
+async def _recipients(session: AsyncSession, events) -> dict[int, set[int]]:
+    """Owner and collaborators of each event, in one query."""
+    recipients = {event.id: {event.owner_id} for event in events}
+    rows = (await session.exec(
+        select(EventPermission.event_id, EventPermission.user_id)
+        .where(EventPermission.event_id.in_(recipients))
+    )).all()
+    for event_id, user_id in rows:
+        recipients[event_id].add(user_id)
+    return recipients
+
+
+def _notify_combined(session: AsyncSession, kind: str, events, recipients: dict[int, set[int]],
+                     verb: str, link_single: bool = True):
+    """
+    One notification per recipient covering every event of the batch they
+    are involved in; recipients of the same set of events share an outbox row.
+    """
+    titles = {event.id: event.title for event in events}
+    by_user: dict[int, list[int]] = {}
+    for event_id, user_ids in recipients.items():
+        for user_id in user_ids:
+            by_user.setdefault(user_id, []).append(event_id)
+    groups: dict[tuple[int, ...], list[int]] = {}
+    for user_id, event_ids in by_user.items():
+        groups.setdefault(tuple(sorted(event_ids)), []).append(user_id)
+
+    timestamp = datetime.utcnow().isoformat()
+    for event_ids, user_ids in groups.items():
+        single = len(event_ids) == 1
+        payload = {"event_ids": list(event_ids), "timestamp": timestamp}
+        if single:
+            payload["event_id"] = event_ids[0]
+        outbox.enqueue(
+            session, kind, event_ids[0] if single and link_single else None, user_ids,
+            message=f"Event '{titles[event_ids[0]]}' was {verb}." if single else f"{len(event_ids)} events were {verb}.",
+            payload=payload,
         )
 
 
+async def _delete_events(session: AsyncSession, events: list[Event]):
+    """Delete events with their versions and permissions, notify, and commit."""
+    ids = [event.id for event in events]
+    recipients = await _recipients(session, events)
+    await session.exec(delete(EventVersion).where(EventVersion.event_id.in_(ids)))
+    await session.exec(delete(EventPermission).where(EventPermission.event_id.in_(ids)))
+    # notifications outlive their event; pending outbox rows must not point at it either
+    await session.exec(update(Notification).where(Notification.event_id.in_(ids)).values(event_id=None))
+    await session.exec(update(OutboxMessage).where(OutboxMessage.event_id.in_(ids)).values(event_id=None))
+    await session.exec(delete(Event).where(Event.id.in_(ids)))
+    _notify_combined(session, "event_deleted", events, recipients, "deleted", link_single=False)
+
+    await session.commit()
+    for event in events:
+        untrack_event(event.owner_id, event.id)
+    resolver.invalidate_events(ids)
+    diff_cache.pop_groups(ids)
+    outbox.wake()
+
+
+def _accessible(user_id: int, filters: list, limit: int | None = None) -> list:
+    """
+    Owned and shared arms selecting (id, start_time) of events matching `filters`.
+
+    Each arm is ordered by (start_time, id) and cut at `limit`, so it walks
+    its own index from the cursor and stops after one page.
+    """
+    arms = [
+        select(Event.id, Event.start_time).where(Event.owner_id == user_id, *filters),
+        select(Event.id, Event.start_time)
+        .join(EventPermission, EventPermission.event_id == Event.id)
+        .where(EventPermission.user_id == user_id, *filters),
+    ]
+    arms = [arm.order_by(Event.start_time, Event.id) for arm in arms]
+    if limit is not None:
+        arms = [arm.limit(limit) for arm in arms]
+    return [select(arm.subquery()) for arm in arms]
+
+
+def _series_filters(start: datetime) -> list:
+    """Series that began before `start` but may still have occurrences after it."""
+    return [
+        Event.is_recurring == True,  # noqa: E712
+        Event.start_time < start,
+        or_(Event.recurrence_end.is_(None), Event.recurrence_end > start),
+    ]
+
 
 @router.post("/", response_model=EventRead)
-def create_event(
+async def create_event(
     event_create: EventCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
     # Conflict check
-    check_conflict(session, owner_id=user.id,
-                   start_time=event_create.start_time,
-                   end_time=event_create.end_time)
+    await check_conflict(session, owner_id=user.id,
+                         start_time=event_create.start_time,
+                         end_time=event_create.end_time,
+                         recurrence_pattern=_pattern(event_create))
 
-    new_event = Event(**event_create.dict(), owner_id=user.id)
+    new_event = Event(**event_create.model_dump(), owner_id=user.id)
+    _set_recurrence_end(new_event)
     session.add(new_event)
-    session.commit()
-    session.refresh(new_event)
-
-    # Notification: owner gets a “created” notice
-    notif = Notification(
-        user_id=user.id,
-        event_id=new_event.id,
-        message=f"Event '{new_event.title}' created."
-    )
-    session.add(notif)
-    session.commit()
+    await session.flush()
 
-    # Push real-time update (if WS client connected)
-    datetime_now = datetime.utcnow().isoformat()
-    # (fire-and-forget)
-    _ = notify_user(user.id, {
-        "type": "event_created",
-        "event_id": new_event.id,
-        "timestamp": datetime_now
-    })
+    # Notification: owner gets a “created” notice, committed with the event
+    outbox.enqueue(
+        session, "event_created", new_event.id, [user.id],
+        message=f"Event '{new_event.title}' created.",
+        payload={"timestamp": datetime.utcnow().isoformat()},
+    )
+    await session.commit()
+    await session.refresh(new_event)
+    track_event(new_event)
+    outbox.wake()
 
     return new_event
 
 
+@router.get("/", response_model=EventPage)
+async def list_events(
+    start: datetime | None = Query(None, description="Only events starting at or after this time"),
+    end: datetime | None = Query(None, description="Only events starting before this time"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Events the user owns or has been shared, ordered by (start_time, id).
+    """
+    start = naive_utc(start) if start is not None else None
+    end = naive_utc(end) if end is not None else None
+    filters = []
+    if end is not None:
+        filters.append(Event.start_time < end)
+    after = decode_cursor(cursor, 2) if cursor is not None else None
+
+    # Recurring series that started earlier are listed (at their own start
+    # time) when one of their occurrences falls inside the window.
+    def in_window(event: Event) -> bool:
+        if start is None or event.start_time >= start:
+            return True
+        try:
+            rule = parse_rule(event.recurrence_pattern)
+        except (TypeError, ValueError):
+            return False
+        return any(
+            occ_start >= start
+            for occ_start, _ in occurrences(event.start_time, event.end_time, rule, start, end or datetime.max)
+        )
+
+    events = []
+    while True:
+        wanted = limit + 1 - len(events)
+        page_filters = list(filters)
+        if after is not None:
+            page_filters.append(tuple_(Event.start_time, Event.id) > tuple_(*after))
+        arms = _accessible(user.id, page_filters + ([Event.start_time >= start] if start else []), wanted)
+        if start is not None:
+            arms += _accessible(user.id, page_filters + _series_filters(start), wanted)
+        candidates = union(*arms).subquery()
+        batch = (await session.exec(
+            select(Event)
+            .join(candidates, candidates.c.id == Event.id)
+            .order_by(Event.start_time, Event.id)
+            .limit(wanted)
+        )).all()
+        events += [e for e in batch if in_window(e)]
+        if len(batch) < wanted or len(events) > limit:
+            break
+        # some series had no occurrence in the window; keep filling the page
+        after = (batch[-1].start_time, batch[-1].id)
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].start_time, events[-1].id)
+    return {"items": events, "next_cursor": next_cursor}
+
+
+@router.get("/occurrences", response_model=list[EventOccurrence])
+async def list_occurrences(
+    start: datetime = Query(..., description="Window start"),
+    end: datetime = Query(..., description="Window end"),
+    limit: int = Query(500, ge=1, le=2000),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Occurrences starting in [start, end) of every event the user can see,
+    with recurring series expanded lazily and merged in start order.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    one_off = union(*_accessible(
+        user.id, [Event.start_time >= start, Event.start_time < end], limit
+    )).subquery()
+    series = union(*_accessible(
+        user.id, _series_filters(start)
+    )).subquery()
+    events = (await session.exec(
+        select(Event).where(
+            or_(Event.id.in_(select(one_off.c.id)), Event.id.in_(select(series.c.id)))
+        )
+    )).all()
+
+    streams = []
+    for event in events:
+        try:
+            rule = parse_rule(event.recurrence_pattern) if _pattern(event) else None
+        except ValueError:
+            rule = None
+        if rule is None:
+            if start <= event.start_time < end:
+                streams.append(iter([(event.start_time, event.end_time, event)]))
+            continue
+        streams.append(
+            (occ_start, occ_end, event)
+            for occ_start, occ_end in occurrences(event.start_time, event.end_time, rule, start, end)
+            if occ_start >= start
+        )
+
+    merged = heapq.merge(*streams, key=lambda occ: (occ[0], occ[2].id))
+    return [
+        EventOccurrence(
+            event_id=event.id,
+            title=event.title,
+            start_time=occ_start,
+            end_time=occ_end,
+            is_recurring=event.is_recurring,
+        )
+        for occ_start, occ_end, event in islice(merged, limit)
+    ]
+
+
+@router.get("/freebusy", response_model=FreeBusyRead)
+async def get_freebusy(
+    user_ids: list[int] = Query(..., alias="user_id", description="Repeat for each participant"),
+    start: datetime = Query(..., description="Window start"),
+    end: datetime = Query(..., description="Window end"),
+    duration: int = Query(30, ge=1, description="Minimum free slot length, in minutes"),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Busy blocks of each participant in [start, end) and the slots where all
+    of them are free for at least `duration` minutes. Only times are
+    returned, never event details.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Window can span at most 366 days")
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 participants")
+
+    busy, free = await freebusy.freebusy(session, user_ids, start, end, timedelta(minutes=duration))
+    return {
+        "start": start,
+        "end": end,
+        "users": [
+            {"user_id": user_id, "busy": [{"start_time": s, "end_time": e} for s, e in blocks]}
+            for user_id, blocks in busy.items()
+        ],
+        "free": [{"start_time": s, "end_time": e} for s, e in free],
+    }
+
+
+@router.get("/{event_id}", response_model=EventRead)
+async def get_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    await require_role(session, event_id, user.id, VIEWERS, "No permission to view")
+    if request.headers.get("if-none-match") is not None:
+        revision = await _revision(session, event_id)
+        if revision is not None and none_match(request, _event_etag(event_id, revision)):
+            return not_modified(_event_etag(event_id, revision), REVALIDATE)
+    event = await session.get(Event, event_id)
+    if event:
+        set_validators(response, _event_etag(event.id, event.revision), REVALIDATE)
+    return event
+
+
 @router.post("/{event_id}/share", response_model=list[PermissionRead])
-def share_event(
+async def share_event(
     event_id: int,
     permissions: list[ShareUserPermission],
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    event = session.get(Event, event_id)
+    event = await session.get(Event, event_id)
     if not event or event.owner_id != user.id:
         raise HTTPException(status_code=403, detail="Only owner can share event")
+    if not permissions:
+        return []
+
+    # the last entry wins when a user is listed twice
+    roles = {p.user_id: p.role for p in permissions}
+    # one INSERT ... ON CONFLICT for every target user; safe against concurrent shares
+    stmt = upsert(session, EventPermission).values([
+        {"event_id": event_id, "user_id": user_id, "role": role} for user_id, role in roles.items()
+    ])
+    granted = (await session.scalars(
+        stmt.on_conflict_do_update(
+            index_elements=["event_id", "user_id"], set_={"role": stmt.excluded.role}
+        ).returning(EventPermission),
+        execution_options={"populate_existing": True},
+    )).all()
+
+    # Notification per shared user, one outbox row per granted role
+    datetime_now = datetime.utcnow().isoformat()
+    by_role: dict[RoleEnum, list[int]] = {}
+    for user_id, role in roles.items():
+        by_role.setdefault(role, []).append(user_id)
+    for role, user_ids in by_role.items():
+        outbox.enqueue(
+            session, "event_shared", event_id, user_ids,
+            message=f"You were granted '{role.value}' access to event '{event.title}'.",
+            payload={"role": role.value, "timestamp": datetime_now},
+        )
+
+    await session.commit()
+    for user_id in roles:
+        resolver.invalidate(event_id, user_id)
+    outbox.wake()
+
+    return granted
 
-    created = []
-    for p in permissions:
-        existing = session.exec(
-            select(EventPermission).where(
-                EventPermission.event_id == event_id,
-                EventPermission.user_id == p.user_id
-            )
-        ).first()
-        if existing:
-            existing.role = p.role
-        else:
-            perm = EventPermission(
-                event_id=event_id,
-                user_id=p.user_id,
-                role=p.role
-            )
-            session.add(perm)
-            created.append(perm)
-
-        # Notification per shared user
-        notif = Notification(
-            user_id=p.user_id,
-            event_id=event_id,
-            message=f"You were granted '{p.role}' access to event '{event.title}'."
+
+@router.post("/share", response_model=ShareEventsResult, tags=["batch"])
+async def share_events(
+    share: ShareEventsRequest,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Share many events with many users in one transaction: every
+    (event, user) pair is upserted in a single executemany batch and each
+    user gets one notification per role, not one per event.
+    """
+    event_ids = list(dict.fromkeys(share.event_ids))
+    roles = {p.user_id: p.role for p in share.permissions}
+    if len(event_ids) > 1000 or len(roles) > 500:
+        raise HTTPException(status_code=400, detail="At most 1000 events and 500 users per request")
+    if not event_ids or not roles:
+        return {"events": len(event_ids), "users": len(roles), "permissions": 0}
+
+    owned = set((await session.exec(
+        select(Event.id).where(Event.id.in_(event_ids), Event.owner_id == user.id)
+    )).all())
+    if len(owned) != len(event_ids):
+        raise HTTPException(
+            status_code=403,
+            detail={"message": "Only owner can share event", "event_ids": [e for e in event_ids if e not in owned]},
         )
-        session.add(notif)
 
-    session.commit()
+    rows = [
+        {"event_id": event_id, "user_id": user_id, "role": role}
+        for event_id in event_ids
+        for user_id, role in roles.items()
+    ]
+    stmt = upsert(session, EventPermission)
+    await session.exec(
+        stmt.on_conflict_do_update(index_elements=["event_id", "user_id"], set_={"role": stmt.excluded.role}),
+        params=rows,
+    )
 
-    # Push real-time notifications for each shared user
     datetime_now = datetime.utcnow().isoformat()
-    for p in permissions:
-        _ = notify_user(p.user_id, {
-            "type": "event_shared",
-            "event_id": event_id,
-            "role": p.role.value,
-            "timestamp": datetime_now
-        })
+    by_role: dict[RoleEnum, list[int]] = {}
+    for user_id, role in roles.items():
+        by_role.setdefault(role, []).append(user_id)
+    for role, user_ids in by_role.items():
+        outbox.enqueue(
+            session, "events_shared", None, user_ids,
+            message=f"You were granted '{role.value}' access to {len(event_ids)} events.",
+            payload={"role": role.value, "event_ids": event_ids, "timestamp": datetime_now},
+        )
 
-    return created
+    await session.commit()
+    # one pass over the cache, not one pop per (event, user) pair
+    resolver.invalidate_events(event_ids)
+    outbox.wake()
+
+    return {"events": len(event_ids), "users": len(roles), "permissions": len(rows)}
 
 
 @router.put("/{event_id}", response_model=EventRead)
-def update_event(
+async def update_event(
     event_id: int,
     event_update: EventUpdate,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    expected_revision: int | None = Query(
+        None, ge=0, description="Only update the event at this revision (the same check as If-Match)"),
+    merge: bool = Query(
+        False, description="On a revision mismatch, still update if none of the fields sent changed since"),
+    session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
-    event = session.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-
-    # Permission check
-    if event.owner_id != user.id:
-        perm = session.exec(
-            select(EventPermission).where(
-                EventPermission.event_id == event_id,
-                EventPermission.user_id == user.id
-            )
-        ).first()
-        if not perm or perm.role not in ("owner", "editor"):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No permission to edit")
-
-    # Snapshot version
-    latest = session.exec(
-        select(EventVersion)
-        .where(EventVersion.event_id == event_id)
-        .order_by(EventVersion.version_number.desc())
-    ).first()
-    next_version = (latest.version_number + 1) if latest else 1
-
-    session.add(EventVersion(
-        event_id=event.id,
-        version_number=next_version,
-        title=event.title,
-        description=event.description,
-        start_time=event.start_time,
-        end_time=event.end_time,
-        location=event.location,
-        updated_by=user.id
-    ))
-
-    # Conflict check
-    new_start = event_update.start_time or event.start_time
-    new_end   = event_update.end_time   or event.end_time
-    check_conflict(session,
-                   owner_id=event.owner_id,
-                   start_time=new_start,
-                   end_time=new_end,
-                   exclude_event_id=event_id)
-
-    # Apply updates
-    event.title       = event_update.title       or event.title
-    event.description = event_update.description or event.description
-    event.start_time  = new_start
-    event.end_time    = new_end
-    event.location    = event_update.location    or event.location
-
-    session.commit()
-    session.refresh(event)
-
-    # Notification to owner and all shared users
-    # Gather recipients: owner + any EventPermission.user_id
-    recipients = {event.owner_id} | {
-        perm.user_id
-        for perm in session.exec(
-            select(EventPermission).where(EventPermission.event_id == event_id)
-        ).all()
-    }
-
-    notif_objs = []
-    datetime_now = datetime.utcnow().isoformat()
-    for uid in recipients:
-        notif = Notification(
-            user_id=uid,
-            event_id=event.id,
-            message=f"Event '{event.title}' was updated."
+    """
+    Optimistic concurrency: the event row is only written at the revision
+    it was read at, so a concurrent update is caught at commit instead of
+    being overwritten. A conditional update (If-Match or
+    `expected_revision`) answers 412 once the event has moved on, unless
+    `merge` is set and the fields sent were left alone since. Unconditional
+    and merged updates that lose a race are re-applied to the fresh row.
+    """
+    expected = _expected_revision(request, event_id, expected_revision)
+    fields = {f for f in history.FIELDS if getattr(event_update, f, None)}
+
+    for attempt in range(EVENT_UPDATE_RETRIES + 1):
+        if attempt:
+            await _backoff(attempt)
+        event = await session.get(Event, event_id, populate_existing=True)
+        if not event:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+
+        # Permission check
+        if event.owner_id != user.id:
+            await require_role(session, event_id, user.id, EDITORS, "No permission to edit")
+
+        # If-Match: only update the revision the client last saw
+        await _check_revision(session, event, expected, fields, merge)
+
+        # Snapshot version
+        before = history.snapshot(event)
+
+        # Conflict check
+        new_start = event_update.start_time or event.start_time
+        new_end   = event_update.end_time   or event.end_time
+        await check_conflict(session,
+                             owner_id=event.owner_id,
+                             start_time=new_start,
+                             end_time=new_end,
+                             exclude_event_id=event_id,
+                             recurrence_pattern=_pattern(event))
+
+        # Notification to owner and all shared users
+        # Gather recipients: owner + any EventPermission.user_id
+        # (read before the changes, so nothing is flushed ahead of the commit)
+        recipients = {event.owner_id} | set(
+            (await session.exec(
+                select(EventPermission.user_id).where(EventPermission.event_id == event_id)
+            )).all()
         )
-        session.add(notif)
-        notif_objs.append(notif)
-        # real-time push
-        _ = notify_user(uid, {
-            "type": "event_updated",
-            "event_id": event.id,
-            "timestamp": datetime_now
-        })
 
-    session.commit()
+        # Apply updates
+        event.title       = event_update.title       or event.title
+        event.description = event_update.description or event.description
+        event.start_time  = new_start
+        event.end_time    = new_end
+        event.location    = event_update.location    or event.location
+        _set_recurrence_end(event)
+        history.record_version(session, event, before, user.id)
+
+        outbox.enqueue(
+            session, "event_updated", event.id, recipients,
+            message=f"Event '{event.title}' was updated.",
+            payload={"timestamp": datetime.utcnow().isoformat()},
+        )
 
-    return event
+        if await _committed(session):
+            break
+    else:
+        raise _busy(event_id)
 
+    track_event(event)
+    outbox.wake()
 
-# @router.post("/", response_model=EventRead)
-# def create_event(
-#     event_create: EventCreate,
-#     session: Session = Depends(get_session),
-#     user=Depends(get_current_user),
-# ):
-#     # Conflict check for this new event
-#     check_conflict(
-#         session,
-#         owner_id=user.id,
-#         start_time=event_create.start_time,
-#         end_time=event_create.end_time
-#     )
-
-#     new_event = Event(**event_create.dict(), owner_id=user.id)
-#     session.add(new_event)
-#     session.commit()
-#     session.refresh(new_event)
-#     return new_event
-
-# @router.put("/{event_id}", response_model=EventRead)
-# def update_event(
-#     event_id: int,
-#     event_update: EventUpdate,
-#     session: Session = Depends(get_session),
-#     user=Depends(get_current_user),
-# ):
-#     event = session.get(Event, event_id)
-#     if not event:
-#         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-
-#     # Permission check (owner or editor)
-#     if event.owner_id != user.id:
-#         perm = session.exec(
-#             select(EventPermission).where(
-#                 EventPermission.event_id == event_id,
-#                 EventPermission.user_id == user.id
-#             )
-#         ).first()
-#         if not perm or perm.role not in ("owner", "editor"):
-#             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No permission to edit")
-
-#     # Save previous version snapshot
-#     latest = session.exec(
-#         select(EventVersion)
-#         .where(EventVersion.event_id == event_id)
-#         .order_by(EventVersion.version_number.desc())
-#     ).first()
-#     next_version = (latest.version_number + 1) if latest else 1
-
-#     session.add(EventVersion(
-#         event_id=event.id,
-#         version_number=next_version,
-#         title=event.title,
-#         description=event.description,
-#         start_time=event.start_time,
-#         end_time=event.end_time,
-#         location=event.location,
-#         updated_by=user.id
-#     ))
-
-#     # Determine new times for conflict check
-#     new_start = event_update.start_time or event.start_time
-#     new_end   = event_update.end_time   or event.end_time
-
-#     # Conflict check against *owner*’s other events
-#     check_conflict(
-#         session,
-#         owner_id=event.owner_id,
-#         start_time=new_start,
-#         end_time=new_end,
-#         exclude_event_id=event_id
-#     )
-
-#     # Apply updates
-#     event.title       = event_update.title       or event.title
-#     event.description = event_update.description or event.description
-#     event.start_time  = new_start
-#     event.end_time    = new_end
-#     event.location    = event_update.location    or event.location
-
-#     session.commit()
-#     session.refresh(event)
-#     return event
-
-# @router.post("/{event_id}/share", response_model=list[PermissionRead])
-# def share_event(
-#     event_id: int,
-#     permissions: list[ShareUserPermission],
-#     session: Session = Depends(get_session),
-#     user: User = Depends(get_current_user)
-# ):
-#     event = session.get(Event, event_id)
-#     if not event or event.owner_id != user.id:
-#         raise HTTPException(status_code=403, detail="Only owner can share event")
-
-#     created = []
-#     for p in permissions:
-#         existing = session.exec(
-#             select(EventPermission).where(
-#                 EventPermission.event_id == event_id,
-#                 EventPermission.user_id == p.user_id
-#             )
-#         ).first()
-#         if existing:
-#             existing.role = p.role  # update existing
-#         else:
-#             permission = EventPermission(event_id=event_id, user_id=p.user_id, role=p.role)
-#             session.add(permission)
-#             created.append(permission)
-
-#     session.commit()
-#     return created
-
-
-# @router.get("/", response_model=list[EventRead])
-# def list_events(
-#     session: Session = Depends(get_session),
-#     user: User = Depends(get_current_user),
-# ):
-#     # Fetch events where user is owner or has permissions
-#     events = session.exec(
-#         select(Event).where(Event.owner_id == user.id)
-#     ).all()
-#     return events
+    set_validators(response, _event_etag(event.id, event.revision), REVALIDATE)
+    return event
 
 
 @router.get("/{event_id}/permissions", response_model=list[PermissionRead])
-def get_event_permissions(
+async def get_event_permissions(
     event_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user)
 ):
-    event = session.get(Event, event_id)
-    if not event or event.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Only owner can view permissions")
+    await require_role(session, event_id, user.id, OWNER, "Only owner can view permissions")
 
-    return session.exec(
+    return (await session.exec(
         select(EventPermission).where(EventPermission.event_id == event_id)
-    ).all()
+    )).all()
 
 @router.put("/{event_id}/permissions/{user_id}", response_model=PermissionRead)
-def update_permission(
+async def update_permission(
     event_id: int,
     user_id: int,
     update: ShareUserPermission,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user)
 ):
-    event = session.get(Event, event_id)
-    if not event or event.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Only owner can update permissions")
+    await require_role(session, event_id, user.id, OWNER, "Only owner can update permissions")
 
-    permission = session.exec(
+    permission = (await session.exec(
         select(EventPermission).where(
             EventPermission.event_id == event_id,
             EventPermission.user_id == user_id
         )
-    ).first()
+    )).first()
 
     if not permission:
         raise HTTPException(status_code=404, detail="Permission not found")
 
     permission.role = update.role
-    session.commit()
-    session.refresh(permission)
+    await session.commit()
+    resolver.invalidate(event_id, user_id)
+    await session.refresh(permission)
     return permission
 
 @router.delete("/{event_id}/permissions/{user_id}")
-def delete_permission(
+async def delete_permission(
     event_id: int,
     user_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user)
 ):
-    event = session.get(Event, event_id)
-    if not event or event.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Only owner can remove permissions")
+    await require_role(session, event_id, user.id, OWNER, "Only owner can remove permissions")
 
-    permission = session.exec(
+    permission = (await session.exec(
         select(EventPermission).where(
             EventPermission.event_id == event_id,
             EventPermission.user_id == user_id
         )
-    ).first()
+    )).first()
 
     if not permission:
         raise HTTPException(status_code=404, detail="Permission not found")
 
-    session.delete(permission)
-    session.commit()
+    await session.delete(permission)
+    await session.commit()
+    resolver.invalidate(event_id, user_id)
     return {"detail": "Permission removed"}
 
 
 
 
 @router.get("/{event_id}/history/{version_id}", response_model=EventVersionRead)
-def get_version(
+async def get_version(
     event_id: int,
     version_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    version = session.get(EventVersion, version_id)
-    if not version or version.event_id != event_id:
+    await require_role(session, event_id, user.id, VIEWERS, "No permission to view")
+    etag = strong_etag("version", event_id, await _incarnation(session, event_id), version_id)
+    if none_match(request, etag):
+        return not_modified(etag, IMMUTABLE)
+    version = await history.load_version(session, event_id, version_id)
+    if not version:
         raise HTTPException(status_code=404, detail="Version not found")
+    set_validators(response, etag, IMMUTABLE)
     return version
 
 
 @router.post("/{event_id}/rollback/{version_id}", response_model=EventRead)
-def rollback_event(
+async def rollback_event(
     event_id: int,
     version_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    expected_revision: int | None = Query(
+        None, ge=0, description="Only roll back the event at this revision (the same check as If-Match)"),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    event = session.get(Event, event_id)
-    version = session.get(EventVersion, version_id)
-
-    if not event or not version or version.event_id != event_id:
-        raise HTTPException(status_code=404, detail="Event or version not found")
-
-    if event.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Only owner can rollback")
-
-    # Save rollback as a new version
-    latest_version = session.exec(
-        select(EventVersion)
-        .where(EventVersion.event_id == event_id)
-        .order_by(EventVersion.version_number.desc())
-    ).first()
-
-    rollback_version_number = (latest_version.version_number + 1) if latest_version else 1
-
-    rollback_version = EventVersion(
-        event_id=event_id,
-        version_number=rollback_version_number,
-        title=event.title,
-        description=event.description,
-        start_time=event.start_time,
-        end_time=event.end_time,
-        location=event.location,
-        updated_by=user.id
-    )
-    session.add(rollback_version)
-
-    # Rollback event
-    event.title = version.title
-    event.description = version.description
-    event.start_time = version.start_time
-    event.end_time = version.end_time
-    event.location = version.location
-
-    session.commit()
-    session.refresh(event)
+    """
+    Restore a version as a new revision; written under the same revision
+    check as `update_event`. A rollback replaces every field, so it is
+    never merged: a conditional one answers 412 once the event moved on.
+    """
+    expected = _expected_revision(request, event_id, expected_revision)
+    version = None
+
+    for attempt in range(EVENT_UPDATE_RETRIES + 1):
+        if attempt:
+            await _backoff(attempt)
+        event = await session.get(Event, event_id, populate_existing=True)
+        if event and version is None:
+            version = await history.load_version(session, event_id, version_id)
+
+        if not event or not version:
+            raise HTTPException(status_code=404, detail="Event or version not found")
+
+        if event.owner_id != user.id:
+            raise HTTPException(status_code=403, detail="Only owner can rollback")
+
+        await _check_revision(session, event, expected)
+
+        # Save rollback as a new version
+        before = history.snapshot(event)
+
+        # The restored times must not collide with events created since
+        await check_conflict(session,
+                             owner_id=event.owner_id,
+                             start_time=version.start_time,
+                             end_time=version.end_time,
+                             exclude_event_id=event_id,
+                             recurrence_pattern=_pattern(event))
+
+        # Rollback event
+        event.title = version.title
+        event.description = version.description
+        event.start_time = version.start_time
+        event.end_time = version.end_time
+        event.location = version.location
+        _set_recurrence_end(event)
+        history.record_version(session, event, before, user.id)
+
+        if await _committed(session):
+            break
+    else:
+        raise _busy(event_id)
+
+    track_event(event)
+    set_validators(response, _event_etag(event.id, event.revision), REVALIDATE)
     return event
 
 
 
-@router.get("/{event_id}/changelog", response_model=list[EventVersionRead], tags=["changelog"])
-def get_changelog(
+@router.get(
+    "/{event_id}/changelog",
+    tags=["changelog"],
+    response_class=StreamingResponse,
+    responses={200: {
+        "description": "One `EventVersionRead` per line (NDJSON), or back-to-back MessagePack "
+                       "objects when `Accept: application/msgpack`, by version_number",
+        "content": {"application/x-ndjson": {}, MSGPACK: {}},
+    }},
+)
+async def get_changelog(
     event_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    after: int = Query(0, ge=0, description="Only versions numbered above this (the last version_number seen)"),
+    limit: int | None = Query(None, ge=1, description="Stop after this many versions"),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
     # Ensure user can view (owner/editor/viewer)
-    event = session.get(Event, event_id)
-    if not event:
-        raise HTTPException(404, "Event not found")
-    # Optionally check sharing permissions here...
-    
-    versions = session.exec(
-        select(EventVersion)
-        .where(EventVersion.event_id == event_id)
-        .order_by(EventVersion.version_number)
-    ).all()
-    return versions
+    await require_role(session, event_id, user.id, VIEWERS, "No permission to view")
+
+    # the log only grows with the revision, so that validates any slice of it
+    etag = weak_etag("changelog", event_id, await _revision(session, event_id) or 0, after, limit or "")
+    if none_match(request, etag):
+        return not_modified(etag, REVALIDATE)
+
+    as_msgpack = wants_msgpack()
+
+    def encode(version) -> bytes:
+        read = EventVersionRead.model_validate(version, from_attributes=True)
+        if as_msgpack:
+            return packb(read.model_dump(mode="json"))
+        return read.model_dump_json().encode() + b"\n"
+
+    async def chunks():
+        # the request session is closed before the body is sent
+        async with async_session() as stream_session:
+            buffer = []
+            async for version in history.iter_versions(stream_session, event_id, after, limit):
+                buffer.append(encode(version))
+                if len(buffer) >= 100:
+                    yield b"".join(buffer)
+                    buffer = []
+            if buffer:
+                yield b"".join(buffer)
+
+    return StreamingResponse(
+        chunks(),
+        media_type=MSGPACK if as_msgpack else "application/x-ndjson",
+        headers={"Vary": "Accept", "ETag": etag, "Cache-Control": REVALIDATE},
+    )
 
 
 
+@router.get("/{event_id}/diff", tags=["changelog"])
+async def get_range_diff(
+    event_id: int,
+    request: Request,
+    response: Response,
+    from_version: int = Query(..., ge=1, description="version_number to diff from"),
+    to_version: int = Query(..., ge=1, description="version_number to diff to"),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Net field changes between two version numbers, however many versions
+    lie in between.
+    """
+    await require_role(session, event_id, user.id, VIEWERS, "No permission to view")
+    incarnation = await _incarnation(session, event_id)
+    etag = strong_etag("diff", event_id, incarnation, "n", from_version, to_version)
+    if none_match(request, etag):
+        return not_modified(etag, IMMUTABLE)
+    key = ("range", event_id, incarnation, from_version, to_version)
+    diff = diff_cache.get(key)
+    if diff is MISSING:
+        versions = await history.load_numbers(session, event_id, [from_version, to_version])
+        if from_version not in versions or to_version not in versions:
+            raise HTTPException(404, "One or both versions not found")
+        diff = diff_versions(versions[from_version], versions[to_version])
+        diff_cache.set(key, diff)
+    set_validators(response, etag, IMMUTABLE)
+    return diff
+
+
 @router.get("/{event_id}/diff/{v1_id}/{v2_id}", tags=["changelog"])
-def get_diff(
+async def get_diff(
     event_id: int,
     v1_id: int,
     v2_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    v1 = session.get(EventVersion, v1_id)
-    v2 = session.get(EventVersion, v2_id)
-    if not v1 or not v2 or v1.event_id != event_id or v2.event_id != event_id:
-        raise HTTPException(404, "One or both versions not found")
-    return diff_versions(v1, v2)
+    await require_role(session, event_id, user.id, VIEWERS, "No permission to view")
+    incarnation = await _incarnation(session, event_id)
+    etag = strong_etag("diff", event_id, incarnation, v1_id, v2_id)
+    if none_match(request, etag):
+        return not_modified(etag, IMMUTABLE)
+    key = ("id", event_id, incarnation, v1_id, v2_id)
+    diff = diff_cache.get(key)
+    if diff is MISSING:
+        v1 = await history.load_version(session, event_id, v1_id)
+        v2 = await history.load_version(session, event_id, v2_id)
+        if not v1 or not v2:
+            raise HTTPException(404, "One or both versions not found")
+        diff = diff_versions(v1, v2)
+        diff_cache.set(key, diff)
+    set_validators(response, etag, IMMUTABLE)
+    return diff
 
 
 @router.post("/batch", response_model=List[EventRead], tags=["batch"])
-def create_events_batch(
+async def create_events_batch(
     batch: EventBatchCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    created = []
+    if not batch.events:
+        return []
+
+    # Conflicts inside the payload and against stored events, in one query
+    conflicts = await find_batch_conflicts(
+        session, user.id, [(e.start_time, e.end_time, _pattern(e)) for e in batch.events]
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Batch contains time conflicts", "conflicts": conflicts},
+        )
+
+    rows = [
+        {
+            **e.model_dump(),
+            "owner_id": user.id,
+            "recurrence_end": series_end_for(e.start_time, e.end_time, e.is_recurring, e.recurrence_pattern),
+        }
+        for e in batch.events
+    ]
     try:
-        for e in batch.events:
-            # conflict check per event
-            check_conflict(session, user.id, e.start_time, e.end_time)
-            ev = Event(**e.dict(), owner_id=user.id)
-            session.add(ev)
-            created.append(ev)
-        session.commit()
-        for ev in created:
-            session.refresh(ev)
-        return created
-    except HTTPException:
-        session.rollback()
-        raise   # re-raise conflict or permission errors
-    except SQLAlchemyError as exc:
-        session.rollback()
+        # multi-row INSERT ... RETURNING id, ids come back in payload order
+        ids = await insert_ids(session, Event, rows)
+        await session.commit()
+    except SQLAlchemyError:
+        await session.rollback()
         raise HTTPException(500, detail="Batch creation failed")
+
+    created = [EventRead(id=event_id, **e.model_dump(), owner_id=user.id) for event_id, e in zip(ids, batch.events)]
+    for ev in created:
+        track_event(ev)
+    return created
+
+
+@router.patch("/batch", response_model=List[EventRead], tags=["batch"])
+async def update_events_batch(
+    batch: EventBatchUpdate,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Apply many partial updates atomically: one query for the events, one
+    for the caller's roles, a set-based conflict check per owner, bulk
+    version rows and one combined notification per recipient.
+    """
+    # the last entry wins when an event is listed twice
+    items = {item.id: item for item in batch.events}
+    if not items:
+        return []
+    if len(items) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 events per batch")
+
+    events = {e.id: e for e in (await session.exec(select(Event).where(Event.id.in_(items)))).all()}
+    missing = [event_id for event_id in items if event_id not in events]
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Events not found", "event_ids": missing})
+    roles = await resolver.roles_for_user(session, user.id, items)
+    forbidden = [event_id for event_id in items if roles.get(event_id) not in EDITORS]
+    if forbidden:
+        raise HTTPException(status_code=403, detail={"message": "No permission to edit", "event_ids": forbidden})
+
+    # The batch's events are checked against each other at their new times
+    # and against every other event of their owner
+    order = list(items)
+    position = {event_id: i for i, event_id in enumerate(order)}
+    planned = {
+        event_id: (item.start_time or events[event_id].start_time, item.end_time or events[event_id].end_time)
+        for event_id, item in items.items()
+    }
+    by_owner: dict[int, list[int]] = {}
+    for event_id in order:
+        by_owner.setdefault(events[event_id].owner_id, []).append(event_id)
+    conflicts = []
+    for owner_id, event_ids in by_owner.items():
+        found = await find_batch_conflicts(
+            session, owner_id,
+            [(*planned[event_id], _pattern(events[event_id])) for event_id in event_ids],
+            exclude_event_ids=event_ids,
+        )
+        for c in found:
+            c["index"] = position[event_ids[c["index"]]]
+            if "with_index" in c:
+                c["with_index"] = position[event_ids[c["with_index"]]]
+            conflicts.append(c)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Batch contains time conflicts", "conflicts": conflicts},
+        )
+
+    updated = [events[event_id] for event_id in order]
+    recipients = await _recipients(session, updated)
+    for event_id, item in items.items():
+        event = events[event_id]
+        before = history.snapshot(event)
+        event.title       = item.title       or event.title
+        event.description = item.description or event.description
+        event.start_time, event.end_time = planned[event_id]
+        event.location    = item.location    or event.location
+        _set_recurrence_end(event)
+        history.record_version(session, event, before, user.id)
+
+    _notify_combined(session, "event_updated", updated, recipients, "updated")
+    # all or nothing: an event changed since it was read fails the whole batch
+    if not await _committed(session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Events were changed concurrently, try again", "event_ids": order},
+        )
+    for event in updated:
+        track_event(event)
+    outbox.wake()
+    return updated
+
+
+@router.delete("/batch", tags=["batch"])
+async def delete_events_batch(
+    batch: EventBatchDelete,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """Delete many events (owner only) with their history, atomically."""
+    event_ids = list(dict.fromkeys(batch.event_ids))
+    if not event_ids:
+        return {"detail": "0 events deleted", "event_ids": []}
+    if len(event_ids) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 events per batch")
+
+    events = (await session.exec(select(Event).where(Event.id.in_(event_ids)))).all()
+    found = {event.id for event in events}
+    missing = [event_id for event_id in event_ids if event_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Events not found", "event_ids": missing})
+    forbidden = [event.id for event in events if event.owner_id != user.id]
+    if forbidden:
+        raise HTTPException(status_code=403, detail={"message": "Only owner can delete", "event_ids": forbidden})
+
+    await _delete_events(session, events)
+    return {"detail": f"{len(events)} events deleted", "event_ids": event_ids}
+
+
+@router.delete("/{event_id}")
+async def delete_event(
+    event_id: int,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    event = await session.get(Event, event_id)
+    if not event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if event.owner_id != user.id:
+        raise HTTPException(status_code=403, detail="Only owner can delete")
+
+    await _delete_events(session, [event])
+    return {"detail": "Event deleted"}
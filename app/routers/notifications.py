@@ -1,13 +1,106 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
-from typing import Dict, List
-from app.core.dependencies import get_current_user_ws
-from app.core.database import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import async_session, get_session
+from app.core.dependencies import get_current_user, get_current_user_ws
+from app.models.notification import Notification
 from app.models.user import User
+from app.schemas.notification import NotificationMarkRead, NotificationPage, UnreadCount
+from app.services import inbox
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.broker import broker
+from app.services.dispatcher import dispatcher, encode
 
 router = APIRouter()
 
-# in-memory store of active WS connections
-active_connections: Dict[int, List[WebSocket]] = {}
+
+@router.get("/api/notifications", response_model=NotificationPage, tags=["notifications"])
+async def list_notifications(
+    unread_only: bool = Query(False),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    The user's notifications, newest first, ordered by (created_at, id).
+    """
+    query = select(Notification).where(Notification.user_id == user.id)
+    if unread_only:
+        query = query.where(Notification.is_read == False)  # noqa: E712
+    if cursor is not None:
+        before = decode_cursor(cursor, 2)
+        query = query.where(tuple_(Notification.created_at, Notification.id) < tuple_(*before))
+    items = (await session.exec(
+        query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/api/notifications/unread-count", response_model=UnreadCount, tags=["notifications"])
+async def get_unread_count(
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    return {"unread": await inbox.unread_count(session, user.id)}
+
+
+@router.post("/api/notifications/read", response_model=UnreadCount, tags=["notifications"])
+async def mark_notifications_read(
+    selection: NotificationMarkRead,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    """
+    Mark the given ids, everything up to `up_to_id`, or `all` notifications
+    as read. Returns the remaining unread count.
+    """
+    if selection.ids is not None and len(selection.ids) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 ids per request")
+    filters = []
+    if selection.ids is not None:
+        filters.append(Notification.id.in_(selection.ids))
+    if selection.up_to_id is not None:
+        filters.append(Notification.id <= selection.up_to_id)
+    await inbox.mark_read(session, user.id, *filters)
+    await session.commit()
+    return {"unread": await inbox.unread_count(session, user.id)}
+
+
+@router.post("/api/notifications/{notif_id}/read", response_model=UnreadCount, tags=["notifications"])
+async def mark_notification_read(
+    notif_id: int,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_current_user),
+):
+    notification = await session.get(Notification, notif_id)
+    if not notification or notification.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    await inbox.mark_read(session, user.id, Notification.id == notif_id)
+    await session.commit()
+    return {"unread": await inbox.unread_count(session, user.id)}
+
+async def _replay(websocket: WebSocket, user_id: int, last_seq: int) -> int:
+    """
+    Send the notifications created or updated after `last_seq`, oldest
+    first, and return the last seq sent. Past WS_REPLAY_LIMIT rows the client is told to
+    resync from the inbox API instead.
+    """
+    async with async_session() as session:
+        missed = await inbox.missed(session, user_id, last_seq, inbox.WS_REPLAY_LIMIT + 1)
+    if len(missed) > inbox.WS_REPLAY_LIMIT:
+        await websocket.send_text(encode({"type": "resync_required"}))
+        return 0
+    for notification in missed:
+        await websocket.send_text(encode(inbox.replay_payload(notification)))
+    return missed[-1].seq if missed else last_seq
+
 
 @router.websocket("/ws/notifications")
 async def notifications_ws(websocket: WebSocket):
@@ -16,10 +109,19 @@ async def notifications_ws(websocket: WebSocket):
     if not user:
         return
 
+    # resume cursor: the last seq the client received
+    last_seq = websocket.query_params.get("last_seq")
+    if last_seq is not None and not last_seq.isdigit():
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     await websocket.accept()
-    active_connections.setdefault(user.id, []).append(websocket)
+    # live messages queue up from here on, so none is lost during the replay
+    conn = await dispatcher.connect(user.id, websocket, paused=last_seq is not None)
 
     try:
+        if last_seq is not None:
+            dispatcher.resume(conn, await _replay(websocket, user.id, int(last_seq)))
         while True:
             # You can receive heartbeat messages if you like
             await websocket.receive_text()
@@ -27,12 +129,12 @@ async def notifications_ws(websocket: WebSocket):
         pass
     finally:
         # Ensure the connection is removed
-        conns = active_connections.get(user.id, [])
-        if websocket in conns:
-            conns.remove(websocket)
+        await dispatcher.disconnect(conn)
 # Utility function used in your event-change code
 async def notify_user(user_id: int, payload: dict):
-    """Send a JSON message to every WebSocket for this user."""
-    conns = active_connections.get(user_id, [])
-    for ws in conns:
-        await ws.send_json(payload)
\ No newline at end of file
+    """
+    Send a JSON message to every WebSocket of this user, in whichever
+    worker holds them. Skips the outbox: nothing is stored, and nothing is
+    retried if this worker dies first.
+    """
+    await broker.publish(user_id, payload)
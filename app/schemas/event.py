@@ -1,16 +1,43 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, field_validator, model_validator
+from datetime import datetime, timezone
+from typing import Annotated, Optional, List
+from app.services.recurrence import parse_rule, series_end_for
+
+def naive_utc(value: datetime) -> datetime:
+    """Times are stored and compared as naive UTC; aware input is converted."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+# request body times: "...Z" / "+02:00" arrive as naive UTC
+# (query parameters are converted with naive_utc in the handlers)
+UTCDateTime = Annotated[datetime, AfterValidator(naive_utc)]
 
 class EventCreate(BaseModel):
     title: str
     description: str
-    start_time: datetime
-    end_time: datetime
+    start_time: UTCDateTime
+    end_time: UTCDateTime
     location: Optional[str] = None
     is_recurring: bool = False
     recurrence_pattern: Optional[str] = None
 
+    @field_validator("recurrence_pattern")
+    @classmethod
+    def check_recurrence_pattern(cls, value):
+        if value is not None:
+            parse_rule(value)  # ValueError becomes a 422
+        return value
+
+    @model_validator(mode="after")
+    def check_series_end(self):
+        # e.g. FREQ=YEARLY;COUNT=100000 ends after year 9999
+        try:
+            series_end_for(self.start_time, self.end_time, self.is_recurring, self.recurrence_pattern)
+        except (ValueError, OverflowError):
+            raise ValueError("recurrence_pattern runs past the last supported date")
+        return self
+
 class EventBatchCreate(BaseModel):
     events: List[EventCreate]
 
@@ -28,12 +55,46 @@ class EventRead(BaseModel):
     class Config:
         orm_mode = True
 
+class EventPage(BaseModel):
+    items: List[EventRead]
+    next_cursor: Optional[str] = None
+
+class EventOccurrence(BaseModel):
+    event_id: int
+    title: str
+    start_time: datetime
+    end_time: datetime
+    is_recurring: bool
+
 class EventUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    start_time: Optional[datetime] = None
-    end_time: Optional[datetime] = None
+    start_time: Optional[UTCDateTime] = None
+    end_time: Optional[UTCDateTime] = None
     location: Optional[str] = None
 
     class Config:
         orm_mode = True
+
+class EventBatchUpdateItem(EventUpdate):
+    id: int
+
+class EventBatchUpdate(BaseModel):
+    events: List[EventBatchUpdateItem]
+
+class EventBatchDelete(BaseModel):
+    event_ids: List[int]
+
+class TimeBlock(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+class UserBusy(BaseModel):
+    user_id: int
+    busy: List[TimeBlock]
+
+class FreeBusyRead(BaseModel):
+    start: datetime
+    end: datetime
+    users: List[UserBusy]
+    free: List[TimeBlock]
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, model_validator
+from datetime import datetime
+from typing import Optional, List
+
+class NotificationRead(BaseModel):
+    id: int
+    event_id: Optional[int]
+    kind: Optional[str] = None
+    message: str
+    count: int = 1
+    seq: int = 0  # WebSocket resume cursor (last_seq) as of this row's latest change
+    is_read: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class NotificationPage(BaseModel):
+    items: List[NotificationRead]
+    next_cursor: Optional[str] = None
+
+class NotificationMarkRead(BaseModel):
+    ids: Optional[List[int]] = None
+    up_to_id: Optional[int] = None  # everything up to and including this id
+    all: bool = False
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.ids is None and self.up_to_id is None and not self.all:
+            raise ValueError("Give ids, up_to_id or all")
+        return self
+
+class UnreadCount(BaseModel):
+    unread: int
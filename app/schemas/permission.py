@@ -1,5 +1,6 @@
 
 from pydantic import BaseModel
+from typing import List
 from app.models.user import RoleEnum
 
 class ShareUserPermission(BaseModel):
@@ -14,3 +15,12 @@ class PermissionRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+class ShareEventsRequest(BaseModel):
+    event_ids: List[int]
+    permissions: List[ShareUserPermission]
+
+class ShareEventsResult(BaseModel):
+    events: int
+    users: int
+    permissions: int
@@ -1,15 +1,16 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class EventVersionRead(BaseModel):
     id: int
     event_id: int
     version_number: int
     title: str
-    description: str
+    description: Optional[str] = None
     start_time: datetime
     end_time: datetime
-    location: str
+    location: Optional[str] = None
     updated_by: int
     updated_at: datetime
 
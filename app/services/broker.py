@@ -0,0 +1,320 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+
+from sqlalchemy.engine import make_url
+
+from app.core.database import DATABASE_URL
+from app.services.dispatcher import NotificationDispatcher, dispatcher, encode
+
+try:
+    import asyncpg
+except ImportError:  # only needed by the "postgres" backend
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+# "local": single worker, messages never leave the process
+# "unix": workers on one host exchange datagrams over Unix sockets
+# "postgres": workers anywhere share LISTEN/NOTIFY on the app database
+NOTIFY_BROKER = os.getenv("NOTIFY_BROKER", "local")
+BROKER_SOCKET_DIR = os.getenv("BROKER_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "ems-broker"))
+
+
+class Broker:
+    """
+    Routes notifications to whichever worker holds the user's sockets.
+
+    The dispatcher reports users gaining their first socket (`subscribe`)
+    and losing their last one (`unsubscribe`); a worker only ever receives
+    messages for users it holds. Messages for users held by this worker are
+    delivered directly, without a round trip through the backend.
+    """
+
+    def __init__(self):
+        self.dispatcher: NotificationDispatcher | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.subscribed: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self, target: NotificationDispatcher):
+        self.loop = asyncio.get_running_loop()
+        self.dispatcher = target
+        target.broker = self
+        for user_id in list(target.connections):
+            self.subscribe(user_id)
+
+    async def stop(self):
+        if self.dispatcher is not None:
+            self.dispatcher.broker = None
+
+    def subscribe(self, user_id: int):
+        self.subscribed.add(user_id)
+
+    def unsubscribe(self, user_id: int):
+        self.subscribed.discard(user_id)
+
+    async def publish(self, user_id: int, payload: dict):
+        """Deliver `payload` to every socket of `user_id`, in any worker."""
+        message = encode(payload)
+        if user_id in self.subscribed:
+            self._deliver(user_id, message)
+        await self._send(user_id, message)
+
+    def _spawn(self, coro):
+        # keep a reference until done, the loop only holds tasks weakly
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _deliver(self, user_id: int, message: str):
+        if self.dispatcher is not None:
+            self.dispatcher.publish_message(user_id, message)
+
+    async def _send(self, user_id: int, message: str):
+        """Hand a message to the other workers holding `user_id`."""
+
+
+class LocalBroker(Broker):
+    """Single process: the dispatcher is the only subscriber."""
+
+
+class UnixSocketBroker(Broker):
+    """
+    Workers on one host, each bound to a datagram socket in a shared directory.
+
+    Peers find each other through the directory: a starting worker says
+    hello to every socket there and each peer answers with the users it
+    holds. Subscription changes are then broadcast, so every worker keeps a
+    user -> peers table and sends a message only to the peers holding that
+    user. Sockets of dead workers are removed on the first failed send.
+    """
+
+    # datagrams stay well below the default socket buffer
+    SUBSCRIBE_CHUNK = 1000
+
+    def __init__(self, directory: str = BROKER_SOCKET_DIR):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self.sock: socket.socket | None = None
+        self.peers: dict[str, set[int]] = {}
+        self.routes: dict[int, set[str]] = {}
+
+    async def start(self, target: NotificationDispatcher):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sock.bind(self.path)
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), self._on_readable)
+        await super().start(target)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".sock") and path != self.path:
+                self.peers.setdefault(path, set())
+                self._send_to(path, {"op": "hello"})
+
+    async def stop(self):
+        await super().stop()
+        if self.sock is not None:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+            for path in list(self.peers):
+                self._send_to(path, {"op": "bye"})
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def subscribe(self, user_id: int):
+        super().subscribe(user_id)
+        self._broadcast({"op": "sub", "users": [user_id]})
+
+    def unsubscribe(self, user_id: int):
+        super().unsubscribe(user_id)
+        self._broadcast({"op": "unsub", "users": [user_id]})
+
+    async def _send(self, user_id: int, message: str):
+        for path in list(self.routes.get(user_id, ())):
+            self._send_to(path, {"op": "msg", "user": user_id, "body": message})
+
+    def _broadcast(self, frame: dict):
+        for path in list(self.peers):
+            self._send_to(path, frame)
+
+    def _send_to(self, path: str, frame: dict):
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendto(json.dumps(frame).encode(), path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            # the worker is gone; a refused socket file is left over from a crash
+            self._drop_peer(path)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        except BlockingIOError:
+            logger.warning("Broker peer %s is not reading; message dropped", path)
+
+    def _drop_peer(self, path: str):
+        for user_id in self.peers.pop(path, ()):
+            paths = self.routes.get(user_id)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.routes[user_id]
+
+    def _on_readable(self):
+        while self.sock is not None:
+            try:
+                data, path = self.sock.recvfrom(65536)
+            except BlockingIOError:
+                return
+            try:
+                self._handle(json.loads(data), path)
+            except Exception:
+                logger.exception("Bad broker frame from %s", path)
+
+    def _handle(self, frame: dict, path: str):
+        op = frame.get("op")
+        if op == "msg":
+            if frame["user"] in self.subscribed:
+                self._deliver(frame["user"], frame["body"])
+            return
+        if not path:
+            return
+        if op == "hello":
+            self.peers.setdefault(path, set())
+            users = sorted(self.subscribed)
+            for i in range(0, len(users), self.SUBSCRIBE_CHUNK):
+                self._send_to(path, {"op": "sub", "users": users[i:i + self.SUBSCRIBE_CHUNK]})
+        elif op == "sub":
+            self.peers.setdefault(path, set()).update(frame["users"])
+            for user_id in frame["users"]:
+                self.routes.setdefault(user_id, set()).add(path)
+        elif op == "unsub":
+            held = self.peers.get(path, set())
+            for user_id in frame["users"]:
+                held.discard(user_id)
+                paths = self.routes.get(user_id)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del self.routes[user_id]
+        elif op == "bye":
+            self._drop_peer(path)
+
+
+class PostgresBroker(Broker):
+    """
+    Workers anywhere, sharing LISTEN/NOTIFY on the application database.
+
+    Each worker LISTENs on one channel per user it holds, over a dedicated
+    asyncpg connection, so Postgres only wakes the workers that hold the
+    user. Every message carries its origin, so a worker skips its own
+    notifications (those users were already served locally).
+    """
+
+    def __init__(self, url: str | None = DATABASE_URL):
+        super().__init__()
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False) if url else None
+        self.origin = uuid.uuid4().hex
+        self.conn = None
+        self.listening: set[int] = set()
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def channel(user_id: int) -> str:
+        return f"ems_user_{user_id}"
+
+    async def start(self, target: NotificationDispatcher):
+        if asyncpg is None:
+            raise RuntimeError("NOTIFY_BROKER=postgres needs asyncpg installed")
+        await super().start(target)
+        async with self._lock:
+            await self._connect()
+
+    async def stop(self):
+        await super().stop()
+        async with self._lock:
+            if self.conn is not None:
+                await self.conn.close()
+                self.conn = None
+
+    def subscribe(self, user_id: int):
+        super().subscribe(user_id)
+        self._spawn(self._sync(user_id))
+
+    def unsubscribe(self, user_id: int):
+        super().unsubscribe(user_id)
+        self._spawn(self._sync(user_id))
+
+    async def _connect(self):
+        # called with the lock held; re-listens every held user after a reconnect
+        self.conn = await asyncpg.connect(self.dsn)
+        self.listening.clear()
+        for user_id in list(self.subscribed):
+            await self.conn.add_listener(self.channel(user_id), self._on_notify)
+            self.listening.add(user_id)
+
+    async def _ensure(self):
+        if self.conn is None or self.conn.is_closed():
+            await self._connect()
+
+    async def _sync(self, user_id: int):
+        """LISTEN or UNLISTEN so the connection matches the current subscription."""
+        async with self._lock:
+            try:
+                await self._ensure()
+                wanted = user_id in self.subscribed
+                if wanted and user_id not in self.listening:
+                    await self.conn.add_listener(self.channel(user_id), self._on_notify)
+                    self.listening.add(user_id)
+                elif not wanted and user_id in self.listening:
+                    await self.conn.remove_listener(self.channel(user_id), self._on_notify)
+                    self.listening.discard(user_id)
+            except Exception:
+                logger.exception("Broker could not update LISTEN for user %s", user_id)
+
+    async def _send(self, user_id: int, message: str):
+        async with self._lock:
+            await self._ensure()
+            await self.conn.execute(
+                "SELECT pg_notify($1, $2)",
+                self.channel(user_id),
+                json.dumps({"origin": self.origin, "body": message}),
+            )
+
+    def _on_notify(self, connection, pid, channel: str, payload: str):
+        frame = json.loads(payload)
+        if frame["origin"] == self.origin:
+            return
+        user_id = int(channel.rsplit("_", 1)[1])
+        if user_id in self.subscribed:
+            self._deliver(user_id, frame["body"])
+
+
+BROKERS = {"local": LocalBroker, "unix": UnixSocketBroker, "postgres": PostgresBroker}
+
+
+def create_broker(kind: str = NOTIFY_BROKER) -> Broker:
+    if kind not in BROKERS:
+        raise ValueError(f"Unknown notification broker: {kind}")
+    return BROKERS[kind]()
+
+
+broker = create_broker()
+
+
+async def start():
+    await broker.start(dispatcher)
+
+
+async def stop():
+    await broker.stop()
@@ -0,0 +1,302 @@
+import os
+import threading
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Collection
+
+from sqlalchemy import or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.services import recurrence
+
+# "db" answers every check with the indexed range query below.
+# "memory" additionally keeps a per-owner interval index in this process;
+# only enable it when a single worker owns all writes for the database.
+CONFLICT_INDEX = os.getenv("CONFLICT_INDEX", "db")
+
+
+class _OwnerIntervals:
+    """
+    Sorted intervals of a single owner.
+
+    Entries are kept ordered by start time. Because every stored interval is
+    at most `max_duration` long, anything overlapping [start, end) must begin
+    in [start - max_duration, end), which bounds the scan to a bisect plus
+    the actual hits.
+    """
+
+    def __init__(self):
+        self.items: list[tuple[datetime, int, datetime]] = []
+        self.by_id: dict[int, tuple[datetime, int, datetime]] = {}
+        self.durations: list[timedelta] = []
+
+    def add(self, event_id: int, start: datetime, end: datetime):
+        self.remove(event_id)
+        item = (start, event_id, end)
+        insort(self.items, item)
+        insort(self.durations, end - start)
+        self.by_id[event_id] = item
+
+    def remove(self, event_id: int):
+        item = self.by_id.pop(event_id, None)
+        if item is None:
+            return
+        start, _, end = item
+        del self.items[bisect_left(self.items, item)]
+        del self.durations[bisect_left(self.durations, end - start)]
+
+    def overlapping(self, start: datetime, end: datetime, exclude_event_id: int | None = None) -> list[int]:
+        if not self.items:
+            return []
+        lo = bisect_left(self.items, (start - self.durations[-1],))
+        hits = []
+        for item_start, event_id, item_end in self.items[lo:]:
+            if item_start >= end:
+                break
+            if item_end > start and event_id != exclude_event_id:
+                hits.append(event_id)
+        return hits
+
+
+class IntervalIndex:
+    """
+    In-process cache of every owner's event intervals.
+
+    Owners are loaded lazily on their first conflict check and must be kept
+    in sync by calling `add` / `remove` after each successful commit.
+    """
+
+    def __init__(self):
+        self._owners: dict[int, _OwnerIntervals] = {}
+        # owner id -> add/remove calls made while that owner was being loaded
+        self._pending: dict[int, list[tuple]] = {}
+        self._lock = threading.Lock()
+
+    async def load(self, session: AsyncSession, owner_id: int) -> _OwnerIntervals:
+        with self._lock:
+            owner = self._owners.get(owner_id)
+            if owner is not None:
+                return owner
+            pending = self._pending.setdefault(owner_id, [])
+
+        rows = (await session.exec(
+            select(Event.id, Event.start_time, Event.end_time).where(Event.owner_id == owner_id)
+        )).all()
+        owner = _OwnerIntervals()
+        for event_id, start, end in rows:
+            owner.add(event_id, start, end)
+
+        with self._lock:
+            # another request may have loaded it meanwhile; keep the first copy
+            if owner_id in self._owners:
+                return self._owners[owner_id]
+            # Commits made while the SELECT ran may be missing from `rows`.
+            # Replaying them in order is safe either way: the last call for
+            # an event wins, as it does in the database.
+            for change, args in pending:
+                getattr(owner, change)(*args)
+            self._pending.pop(owner_id, None)
+            self._owners[owner_id] = owner
+            return owner
+
+    async def overlapping(self, session: AsyncSession, owner_id: int, start: datetime, end: datetime,
+                    exclude_event_id: int | None = None) -> list[int]:
+        owner = await self.load(session, owner_id)
+        with self._lock:
+            return owner.overlapping(start, end, exclude_event_id)
+
+    def _apply(self, owner_id: int, change: str, *args):
+        with self._lock:
+            owner = self._owners.get(owner_id)
+            if owner is not None:
+                getattr(owner, change)(*args)
+            elif owner_id in self._pending:
+                self._pending[owner_id].append((change, args))
+
+    def add(self, owner_id: int, event_id: int, start: datetime, end: datetime):
+        self._apply(owner_id, "add", event_id, start, end)
+
+    def remove(self, owner_id: int, event_id: int):
+        self._apply(owner_id, "remove", event_id)
+
+    def clear(self):
+        with self._lock:
+            self._owners.clear()
+            self._pending.clear()
+
+
+interval_index = IntervalIndex()
+
+
+async def _series_hits(session: AsyncSession, owner_id: int, intervals: list[tuple[datetime, datetime]],
+                 exclude: Collection[int] = ()) -> list[tuple[int, object]]:
+    """(interval position, row) for stored recurring series hitting one of `intervals`."""
+    lo = min(start for start, _ in intervals)
+    hi = max(end for _, end in intervals)
+    query = select(
+        Event.id, Event.title, Event.start_time, Event.end_time, Event.recurrence_pattern
+    ).where(
+        Event.owner_id == owner_id,
+        Event.is_recurring == True,  # noqa: E712
+        Event.recurrence_pattern.is_not(None),
+        or_(Event.recurrence_end.is_(None), Event.recurrence_end > lo),
+        Event.start_time < hi,
+    )
+    if exclude:
+        query = query.where(Event.id.not_in(exclude))
+
+    hits = []
+    for row in (await session.exec(query)).all():
+        try:
+            rule = recurrence.parse_rule(row.recurrence_pattern)
+        except ValueError:
+            continue  # legacy free-text pattern: only its first interval counts
+        for i, (start, end) in enumerate(intervals):
+            if recurrence.overlaps(row.start_time, row.end_time, rule, start, end):
+                hits.append((i, row))
+    return hits
+
+
+async def _existing_hits(session: AsyncSession, owner_id: int, intervals: list[tuple[datetime, datetime]],
+                   exclude: Collection[int] = ()) -> list[tuple[int, object]]:
+    """(interval position, row) for every stored event, other than `exclude`, hitting one of `intervals`."""
+    columns = (Event.id, Event.title, Event.start_time, Event.end_time)
+
+    if CONFLICT_INDEX == "memory":
+        positions: dict[int, list[int]] = {}
+        for i, (start, end) in enumerate(intervals):
+            for event_id in await interval_index.overlapping(session, owner_id, start, end):
+                if event_id not in exclude:
+                    positions.setdefault(event_id, []).append(i)
+        hits = []
+        if positions:
+            rows = (await session.exec(select(*columns).where(Event.id.in_(positions)))).all()
+            hits = [(i, row) for row in rows for i in positions[row.id]]
+        return hits + await _series_hits(session, owner_id, intervals, exclude)
+
+    # Stored events may overlap each other (rows written before checks were
+    # set-based, concurrent creates), so anything with start < hi and end > lo
+    # is a candidate. That is a range scan of ix_event_owner_start_end below
+    # hi or of ix_event_owner_end above lo, with both predicates checked on
+    # index entries; no index bounds both sides, so the cost grows with the
+    # owner's events on the scanned side (see benchmarks/conflict_check.py).
+    # CONFLICT_INDEX=memory is the option whose probes do not grow.
+    lo = min(start for start, _ in intervals)
+    hi = max(end for _, end in intervals)
+    query = select(*columns).where(Event.owner_id == owner_id, Event.start_time < hi, Event.end_time > lo)
+    if exclude:
+        query = query.where(Event.id.not_in(exclude))
+    existing = (await session.exec(query)).all()
+    return _overlaps(intervals, existing) + await _series_hits(session, owner_id, intervals, exclude)
+
+
+def _overlaps(intervals: list[tuple[datetime, datetime]], rows: list) -> list[tuple[int, object]]:
+    """
+    (interval position, row) for every row overlapping one of `intervals`.
+
+    Sweeps both sides in start order; whatever the other side still has open
+    when an interval or row starts overlaps it, so the cost is the sort plus
+    the hits rather than intervals x rows.
+    """
+    edges = sorted(
+        [(start, 0, k, end) for k, (start, end) in enumerate(intervals)]
+        + [(row.start_time, 1, k, row.end_time) for k, row in enumerate(rows)]
+    )
+    # per side, (end, position) of everything started and not yet known to be over
+    open_: tuple[list, list] = ([], [])
+    hits = []
+    for start, side, k, end in edges:
+        other = open_[1 - side]
+        while other and other[0][0] <= start:
+            heapq.heappop(other)
+        for _, j in other:
+            hits.append((k, rows[j]) if side == 0 else (j, rows[k]))
+        heapq.heappush(open_[side], (end, k))
+    return hits
+
+
+async def find_conflicts(session: AsyncSession, owner_id: int, start_time: datetime, end_time: datetime,
+                   exclude_event_id: int | None = None, recurrence_pattern: str | None = None) -> list:
+    """
+    Return every event of `owner_id` overlapping [start_time, end_time), ordered by start.
+
+    With a `recurrence_pattern` the new series is checked occurrence by
+    occurrence (see recurrence.check_window). Stored series are matched in
+    closed form, so their length never matters.
+    """
+    intervals = recurrence.check_window(start_time, end_time, recurrence_pattern)
+    exclude = () if exclude_event_id is None else (exclude_event_id,)
+    rows = {row.id: row for _, row in await _existing_hits(session, owner_id, intervals, exclude)}
+    return sorted(rows.values(), key=lambda row: (row.start_time, row.id))
+
+
+async def find_batch_conflicts(session: AsyncSession, owner_id: int,
+                         items: list[tuple[datetime, datetime, str | None]],
+                         exclude_event_ids: Collection[int] = ()) -> list[dict]:
+    """
+    Check a whole batch of (start, end, recurrence_pattern) items for one owner.
+    Stored events in `exclude_event_ids` (the ones a batch update moves) are
+    ignored; their new times are among the items.
+
+    Returns one entry per overlapping pair, either between two batch items
+    (`index` / `with_index`) or between an item and an existing event
+    (`index` / `event_id`). Costs one range query plus one series query
+    regardless of batch size.
+    """
+    if not items:
+        return []
+    # recurring items take part through each of their occurrences
+    intervals: list[tuple[datetime, datetime]] = []
+    owners: list[int] = []
+    for i, (start, end, pattern) in enumerate(items):
+        for interval in recurrence.check_window(start, end, pattern):
+            intervals.append(interval)
+            owners.append(i)
+    order = sorted(range(len(intervals)), key=lambda k: intervals[k])
+
+    conflicts = []
+    seen: set[tuple] = set()
+
+    # Sweep over the batch sorted by start; `active` holds intervals still open
+    active: list[tuple[datetime, int]] = []
+    for k in order:
+        start, end = intervals[k]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        i = owners[k]
+        for j in sorted({owners[a] for _, a in active} - {i}):
+            pair = (min(i, j), max(i, j))
+            if pair not in seen:
+                seen.add(pair)
+                conflicts.append({"index": pair[0], "with_index": pair[1]})
+        heapq.heappush(active, (end, k))
+
+    hits = await _existing_hits(session, owner_id, intervals, set(exclude_event_ids))
+    for k, row in sorted(hits, key=lambda hit: owners[hit[0]]):
+        key = (owners[k], row.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        conflicts.append({
+            "index": owners[k],
+            "event_id": row.id,
+            "title": row.title,
+            "start_time": row.start_time.isoformat(),
+            "end_time": row.end_time.isoformat(),
+        })
+    return conflicts
+
+
+def track_event(event: Event):
+    """Mirror a committed event into the in-process index."""
+    if CONFLICT_INDEX == "memory":
+        interval_index.add(event.owner_id, event.id, event.start_time, event.end_time)
+
+
+def untrack_event(owner_id: int, event_id: int):
+    """Drop a deleted event from the in-process index."""
+    if CONFLICT_INDEX == "memory":
+        interval_index.remove(owner_id, event_id)
@@ -1,5 +1,15 @@
+import os
+
+from app.core.cache import TTLCache
 from app.models.version import EventVersion
 
+# Versions never change once written, so cached diffs are never stale; keys
+# carry the event's creation time, and deleting an event drops its entries
+DIFF_CACHE_SIZE = int(os.getenv("DIFF_CACHE_SIZE", "10000"))
+
+# keys are (kind, event_id, ...), grouped by event so deletes drop them cheaply
+diff_cache = TTLCache(DIFF_CACHE_SIZE, group=lambda key: key[1])
+
 def diff_versions(v1: EventVersion, v2: EventVersion) -> dict:
     """
     Return a mapping of fields that differ between two versions.
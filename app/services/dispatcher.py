@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+
+from fastapi import WebSocket, status
+
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "100"))
+# "drop_oldest": a full queue discards its oldest message to make room
+# "disconnect": a full queue closes the socket; the client has to reconnect
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+
+
+def encode(payload: dict) -> str:
+    """The wire form of a notification; encoded once per fan-out."""
+    return json.dumps(payload, default=str)
+
+
+class Connection:
+    """One accepted WebSocket with its own bounded send queue and writer task."""
+
+    def __init__(self, user_id: int, websocket: WebSocket, queue_size: int):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.dropped = 0
+        # after a resume: the first `skip_count` queued messages were pushed
+        # while replaying and are skipped if the replay already sent them
+        self.skip_through = 0
+        self.skip_count = 0
+
+
+class NotificationDispatcher:
+    """
+    Fan-out of JSON messages to the WebSockets of each user.
+
+    Every connection gets a bounded queue drained by its own writer task, so
+    one slow socket never delays the others. Publishing only queues, so it
+    never waits on a socket; it must run on the event loop.
+    """
+
+    def __init__(self, queue_size: int = WS_QUEUE_SIZE, policy: str = WS_SLOW_CONSUMER_POLICY):
+        if policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.connections: dict[int, set[Connection]] = {}
+        # set by Broker.start; told when a user gains or loses their last socket
+        self.broker = None
+        self.sent = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    async def connect(self, user_id: int, websocket: WebSocket, paused: bool = False) -> Connection:
+        """
+        Register an accepted socket and start its writer. A `paused`
+        connection already queues live messages but sends nothing until
+        `resume`, so a replay can go out first without losing any.
+        """
+        conn = Connection(user_id, websocket, self.queue_size)
+        if not paused:
+            conn.writer = asyncio.create_task(self._write(conn))
+        if user_id not in self.connections and self.broker is not None:
+            self.broker.subscribe(user_id)
+        self.connections.setdefault(user_id, set()).add(conn)
+        return conn
+
+    def resume(self, conn: Connection, replayed_through: int = 0):
+        """Start a paused connection's writer after notifications up to seq `replayed_through` were replayed."""
+        conn.skip_through = replayed_through
+        conn.skip_count = conn.queue.qsize()
+        if conn.writer is None:
+            conn.writer = asyncio.create_task(self._write(conn))
+
+    async def disconnect(self, conn: Connection):
+        """Unregister a socket and stop its writer."""
+        self._forget(conn)
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+
+    def publish(self, user_id: int, payload: dict):
+        """Queue `payload` for every socket of `user_id`. Event-loop thread only."""
+        if user_id in self.connections:
+            self.publish_message(user_id, encode(payload))
+
+    def publish_message(self, user_id: int, message: str):
+        """Queue an already encoded message for every socket of `user_id`."""
+        conns = self.connections.get(user_id)
+        if not conns:
+            return
+        for conn in list(conns):
+            try:
+                conn.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._on_full(conn, message)
+
+    def stats(self) -> dict:
+        depths = [c.queue.qsize() for conns in list(self.connections.values()) for c in list(conns)]
+        return {
+            "connections": len(depths),
+            "users": len(self.connections),
+            "queue_depth": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
+
+    def _on_full(self, conn: Connection, message: str):
+        if self.policy == "drop_oldest":
+            conn.queue.get_nowait()
+            conn.queue.put_nowait(message)
+            conn.dropped += 1
+            self.dropped += 1
+        else:
+            self.disconnected += 1
+            self._forget(conn)
+            asyncio.create_task(self._close(conn))
+
+    async def _close(self, conn: Connection):
+        if conn.writer is not None:
+            conn.writer.cancel()
+        try:
+            await conn.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    async def _write(self, conn: Connection):
+        try:
+            while True:
+                message = await conn.queue.get()
+                if conn.skip_count:
+                    conn.skip_count -= 1
+                    if self._replayed(conn, message):
+                        continue
+                await conn.websocket.send_text(message)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # socket went away mid-send; the receive loop will notice too
+            self._forget(conn)
+
+    @staticmethod
+    def _replayed(conn: Connection, message: str) -> bool:
+        seq = json.loads(message).get("seq")
+        return seq is not None and seq <= conn.skip_through
+
+    def _forget(self, conn: Connection):
+        conns = self.connections.get(conn.user_id)
+        if conns is None:
+            return
+        conns.discard(conn)
+        if not conns:
+            del self.connections[conn.user_id]
+            if self.broker is not None:
+                self.broker.unsubscribe(conn.user_id)
+
+
+dispatcher = NotificationDispatcher()
@@ -0,0 +1,126 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, union
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.services import recurrence
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python sweep handles any size, just slower
+    np = None
+
+# Interval count above which merging switches to NumPy, when it is installed
+FREEBUSY_NUMPY_THRESHOLD = int(os.getenv("FREEBUSY_NUMPY_THRESHOLD", "5000"))
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+Interval = tuple[datetime, datetime]
+
+
+def _merge_python(intervals: list[Interval]) -> list[Interval]:
+    merged: list[list[datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _merge_numpy(intervals: list[Interval]) -> list[Interval]:
+    bounds = np.array(
+        [((s - _EPOCH) // _US, (e - _EPOCH) // _US) for s, e in intervals], dtype=np.int64
+    )
+    bounds = bounds[np.argsort(bounds[:, 0], kind="stable")]
+    starts, ends = bounds[:, 0], np.maximum.accumulate(bounds[:, 1])
+    # a block starts wherever an interval begins after everything before it ended
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] > ends[:-1])))
+    last = np.concatenate((first[1:] - 1, [len(starts) - 1]))
+    return [
+        (_EPOCH + int(s) * _US, _EPOCH + int(e) * _US)
+        for s, e in zip(starts[first], ends[last])
+    ]
+
+
+def merge(intervals: list[Interval]) -> list[Interval]:
+    """Union of `intervals` as sorted, disjoint blocks (touching ones are joined)."""
+    if not intervals:
+        return []
+    if np is not None and len(intervals) >= FREEBUSY_NUMPY_THRESHOLD:
+        return _merge_numpy(intervals)
+    return _merge_python(intervals)
+
+
+def free_slots(busy: list[Interval], start: datetime, end: datetime,
+               duration: timedelta) -> list[Interval]:
+    """Gaps of at least `duration` in [start, end) around the merged `busy` blocks."""
+    slots = []
+    cursor = start
+    for block_start, block_end in busy:
+        if block_start - cursor >= duration:
+            slots.append((cursor, block_start))
+        cursor = max(cursor, block_end)
+    if end - cursor >= duration:
+        slots.append((cursor, end))
+    return slots
+
+
+async def _intervals(session: AsyncSession, user_ids: list[int], start: datetime,
+                     end: datetime) -> dict[int, list[Interval]]:
+    """
+    Every owned interval of `user_ids` overlapping [start, end), clipped to it.
+
+    One query for all users: events overlapping the window (an owner's
+    events may overlap each other, so no earlier one can be ruled out by
+    order) and series still running. Each arm is a range scan on the
+    owner's start- or end-time indexes.
+    """
+    columns = (Event.id, Event.owner_id, Event.start_time, Event.end_time,
+               Event.is_recurring, Event.recurrence_pattern)
+    rows = (await session.exec(union(
+        select(*columns).where(
+            Event.owner_id.in_(user_ids), Event.start_time < end, Event.end_time > start,
+        ),
+        select(*columns).where(
+            Event.owner_id.in_(user_ids),
+            Event.is_recurring == True,  # noqa: E712
+            Event.start_time < start,
+            or_(Event.recurrence_end.is_(None), Event.recurrence_end > start),
+        ),
+    ))).all()
+
+    found: dict[int, list[Interval]] = {user_id: [] for user_id in user_ids}
+    for row in rows:
+        rule = None
+        if row.is_recurring and row.recurrence_pattern:
+            try:
+                rule = recurrence.parse_rule(row.recurrence_pattern)
+            except ValueError:
+                pass  # legacy free-text pattern: only its first interval counts
+        spans = (
+            recurrence.occurrences(row.start_time, row.end_time, rule, start, end)
+            if rule is not None else [(row.start_time, row.end_time)]
+        )
+        found[row.owner_id].extend(
+            (max(s, start), min(e, end)) for s, e in spans if s < end and e > start
+        )
+    return found
+
+
+async def freebusy(session: AsyncSession, user_ids: list[int], start: datetime, end: datetime,
+                   duration: timedelta) -> tuple[dict[int, list[Interval]], list[Interval]]:
+    """
+    Busy blocks per user and the slots of at least `duration` when all of
+    them are free, within [start, end). Costs one round trip however many
+    users are asked for.
+    """
+    found = await _intervals(session, user_ids, start, end)
+    busy = {user_id: merge(intervals) for user_id, intervals in found.items()}
+    everyone = merge([block for blocks in busy.values() for block in blocks])
+    return busy, free_slots(everyone, start, end, duration)
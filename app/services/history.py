@@ -0,0 +1,189 @@
+import os
+from datetime import datetime
+from typing import AsyncIterator, Iterator
+
+from sqlmodel import func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.models.version import EventVersion
+
+# Every Nth version stores a full snapshot; rebuilding a version replays at
+# most N-1 deltas after the nearest keyframe
+VERSION_KEYFRAME_INTERVAL = max(1, int(os.getenv("VERSION_KEYFRAME_INTERVAL", "20")))
+
+FIELDS = ("title", "description", "start_time", "end_time", "location")
+DATETIME_FIELDS = ("start_time", "end_time")
+
+
+def snapshot(event) -> dict:
+    """The versioned fields of an event (or version) as a plain dict."""
+    return {f: getattr(event, f) for f in FIELDS}
+
+
+def _encode(changes: dict) -> dict:
+    return {
+        f: v.isoformat() if f in DATETIME_FIELDS and v is not None else v
+        for f, v in changes.items()
+    }
+
+
+def _apply(state: dict, delta: dict) -> dict:
+    state = dict(state)
+    for f, v in delta.items():
+        state[f] = datetime.fromisoformat(v) if f in DATETIME_FIELDS and v is not None else v
+    return state
+
+
+def record_version(session: AsyncSession, event: Event, before: dict, user_id: int) -> EventVersion:
+    """
+    Add the version for an update that turned `before` into the event's
+    current fields.
+
+    The row's number comes from `event.revision`, so no history is read.
+    Version N describes the event as it was before its Nth update; every row
+    carries the fields that update changed, and keyframes additionally keep
+    the full pre-update state.
+    """
+    number = (event.revision or 0) + 1
+    event.revision = number
+    after = snapshot(event)
+    is_keyframe = (number - 1) % VERSION_KEYFRAME_INTERVAL == 0
+    version = EventVersion(
+        event_id=event.id,
+        version_number=number,
+        is_keyframe=is_keyframe,
+        delta=_encode({f: after[f] for f in FIELDS if after[f] != before[f]}),
+        updated_by=user_id,
+        **(before if is_keyframe else {}),
+    )
+    session.add(version)
+    return version
+
+
+def _materialize(row: EventVersion, state: dict) -> EventVersion:
+    # a detached copy, so filling in fields never dirties the stored row
+    return EventVersion(
+        id=row.id,
+        event_id=row.event_id,
+        version_number=row.version_number,
+        is_keyframe=row.is_keyframe,
+        updated_by=row.updated_by,
+        updated_at=row.updated_at,
+        **state,
+    )
+
+
+def replay(rows, state: dict | None = None) -> Iterator[tuple[EventVersion, dict]]:
+    """
+    Yield (full version, its fields) for `rows`, ordered by version_number.
+    `state` holds the fields of the first row unless that row is a keyframe.
+    """
+    for row in rows:
+        if row.is_keyframe:
+            state = snapshot(row)
+        yield _materialize(row, state), state
+        state = _apply(state, row.delta or {})
+
+
+def _keyframe_at(event_id: int, number: int):
+    """Number of the nearest keyframe at or before version `number`."""
+    return (
+        select(func.max(EventVersion.version_number))
+        .where(
+            EventVersion.event_id == event_id,
+            EventVersion.is_keyframe == True,  # noqa: E712
+            EventVersion.version_number <= number,
+        )
+        .scalar_subquery()
+    )
+
+
+async def load_numbers(session: AsyncSession, event_id: int, numbers) -> dict[int, EventVersion]:
+    """
+    Rebuild several versions of an event, keyed by version_number.
+
+    One ordered query reads each version's keyframe-to-version range, at
+    most VERSION_KEYFRAME_INTERVAL rows per requested version no matter how
+    far apart they are. Unknown numbers are left out.
+    """
+    numbers = sorted(set(numbers))
+    if not numbers:
+        return {}
+    rows = (await session.exec(
+        select(EventVersion)
+        .where(
+            EventVersion.event_id == event_id,
+            or_(*(
+                EventVersion.version_number.between(_keyframe_at(event_id, n), n)
+                for n in numbers
+            )),
+        )
+        .order_by(EventVersion.version_number)
+    )).all()
+    wanted = set(numbers)
+    return {
+        version.version_number: version
+        for version, _ in replay(rows)
+        if version.version_number in wanted
+    }
+
+
+async def changed_since(session: AsyncSession, event_id: int, revision: int) -> set[str]:
+    """
+    Fields changed by the updates after `revision`: the union of the deltas
+    of the versions numbered above it. Rows from before deltas were stored
+    count as having changed everything.
+    """
+    deltas = (await session.exec(
+        select(EventVersion.delta)
+        .where(EventVersion.event_id == event_id, EventVersion.version_number > revision)
+    )).all()
+    changed = set()
+    for delta in deltas:
+        changed.update(FIELDS if delta is None else delta)
+    return changed
+
+
+async def load_version(session: AsyncSession, event_id: int, version_id: int) -> EventVersion | None:
+    """Rebuild one version of an event, by row id, from its nearest keyframe."""
+    row = await session.get(EventVersion, version_id)
+    if row is None or row.event_id != event_id:
+        return None
+    if row.is_keyframe:
+        return _materialize(row, snapshot(row))
+    return (await load_numbers(session, event_id, [row.version_number]))[row.version_number]
+
+
+async def iter_versions(session: AsyncSession, event_id: int, after: int = 0,
+                        limit: int | None = None, chunk_size: int = 500) -> AsyncIterator[EventVersion]:
+    """
+    Stream full versions numbered above `after`, in order.
+
+    Rows are read in keyset chunks on (event_id, version_number), starting
+    at the keyframe the first version depends on, so memory stays bounded
+    by `chunk_size` however long the history is.
+    """
+    position = select(func.coalesce(_keyframe_at(event_id, after + 1), after + 1)).scalar_subquery()
+    cursor, state, sent = None, None, 0
+    while limit is None or sent < limit:
+        query = select(EventVersion).where(EventVersion.event_id == event_id)
+        if cursor is None:
+            query = query.where(EventVersion.version_number >= position)
+        else:
+            query = query.where(EventVersion.version_number > cursor)
+        rows = (await session.exec(
+            query.order_by(EventVersion.version_number).limit(chunk_size)
+        )).all()
+        for version, state in replay(rows, state):
+            if version.version_number <= after:
+                continue
+            yield version
+            sent += 1
+            if limit is not None and sent >= limit:
+                return
+        if len(rows) < chunk_size:
+            return
+        cursor = rows[-1].version_number
+        # the state after the last row's update seeds the next chunk
+        state = _apply(state, rows[-1].delta or {})
@@ -0,0 +1,196 @@
+import os
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import bindparam, tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import upsert
+from app.models.notification import Notification, NotificationCounter
+
+# Unread notifications of one user about the same event and kind, less than
+# this many seconds apart, are merged into one row with a count; 0 disables
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "900"))
+# Most notifications replayed to a resuming WebSocket before it must resync
+WS_REPLAY_LIMIT = int(os.getenv("WS_REPLAY_LIMIT", "500"))
+
+
+async def sequence(session: AsyncSession, rows: list[dict]):
+    """
+    Give each of `rows` (new or just merged) the next "seq" of its user's
+    feed, in the caller's transaction: one upsert of the users' counters in
+    user order, then consecutive numbers in the order of `rows`.
+
+    The seq is the WebSocket resume cursor. It moves forward whenever a row
+    changes, so an update merged into an already pushed row is replayed too.
+    """
+    counts = Counter(row["user_id"] for row in rows)
+    if not counts:
+        return
+    stmt = upsert(session, NotificationCounter).values(
+        [{"user_id": user_id, "last_seq": counts[user_id]} for user_id in sorted(counts)]
+    )
+    last = dict((await session.exec(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"last_seq": NotificationCounter.last_seq + stmt.excluded.last_seq},
+    ).returning(NotificationCounter.user_id, NotificationCounter.last_seq))).all())
+    next_seq = {user_id: last[user_id] - counts[user_id] + 1 for user_id in counts}
+    for row in rows:
+        row["seq"] = next_seq[row["user_id"]]
+        next_seq[row["user_id"]] += 1
+
+
+async def coalesce(session: AsyncSession, rows: list[dict],
+                   window: float = NOTIFICATION_COALESCE_SECONDS) -> tuple[list[dict], list[dict]]:
+    """
+    Fold new notification `rows` into recent unread ones, in the caller's
+    transaction.
+
+    Returns the rows that still have to be inserted and, for each input row
+    in order, the row it landed in: a stored row (with its "id") or one of
+    the returned inserts (the caller sets "id" on those once inserted).
+    Both carry the "seq" from `sequence`.
+
+    Rows are merged with each other and with stored unread rows of the same
+    (user, event, kind) whose latest notification is within `window` of
+    them. Candidates are read and locked in one query and updated with one
+    executemany, so a burst of edits costs a bounded number of statements.
+    """
+    order = sorted(range(len(rows)), key=lambda i: rows[i]["created_at"])
+    keys = {(row["user_id"], row["event_id"], row["kind"]) for row in rows if row["event_id"] is not None}
+    if window <= 0 or not keys:
+        await sequence(session, [rows[i] for i in order])
+        return rows, rows
+    window = timedelta(seconds=window)
+
+    targets: dict[tuple, dict] = {}
+    stored = (await session.exec(
+        select(Notification.id, Notification.user_id, Notification.event_id, Notification.kind,
+               Notification.count, Notification.updated_at)
+        .where(
+            tuple_(Notification.user_id, Notification.event_id).in_({(u, e) for u, e, _ in keys}),
+            Notification.kind.in_({k for _, _, k in keys}),
+            Notification.is_read == False,  # noqa: E712
+            Notification.updated_at >= rows[order[0]]["created_at"] - window,
+        )
+        .order_by(Notification.updated_at)
+        .with_for_update()
+    )).all()
+    for row in stored:
+        # the latest stored row per key wins
+        targets[(row.user_id, row.event_id, row.kind)] = {
+            "id": row.id, "user_id": row.user_id, "count": row.count, "updated_at": row.updated_at,
+        }
+
+    inserts = []
+    placed: list[dict] = [{}] * len(rows)
+    merged: dict[int, dict] = {}
+    for i in order:
+        row = rows[i]
+        key = (row["user_id"], row["event_id"], row["kind"])
+        target = targets.get(key) if row["event_id"] is not None else None
+        if target is not None and row["created_at"] - target["updated_at"] <= window:
+            target["count"] += row["count"]
+            target["message"] = row["message"]
+            target["updated_at"] = row["created_at"]
+            if "id" in target:
+                merged[target["id"]] = target
+            placed[i] = target
+            continue
+        # either nothing to merge into or the burst went quiet: start a new row
+        inserts.append(row)
+        placed[i] = row
+        if row["event_id"] is not None:
+            targets[key] = row
+
+    merged = list(merged.values())
+    # one feed position per changed row, in the order the changes happened
+    await sequence(session, sorted(inserts + merged, key=lambda t: t["updated_at"]))
+    if merged:
+        table = Notification.__table__
+        await session.exec(
+            update(table)
+            .where(table.c.id == bindparam("target_id"))
+            .values(count=bindparam("new_count"), message=bindparam("new_message"),
+                    updated_at=bindparam("new_updated_at"), seq=bindparam("new_seq")),
+            params=[
+                {"target_id": t["id"], "new_count": t["count"], "new_message": t["message"],
+                 "new_updated_at": t["updated_at"], "new_seq": t["seq"]}
+                for t in merged
+            ],
+        )
+    return inserts, placed
+
+
+async def add_unread(session: AsyncSession, user_ids):
+    """
+    Count newly inserted unread notifications, one entry in `user_ids` per
+    row. A single upsert in user order, inside the caller's transaction.
+    """
+    counts = Counter(user_ids)
+    if not counts:
+        return
+    stmt = upsert(session, NotificationCounter).values(
+        [{"user_id": user_id, "unread": counts[user_id]} for user_id in sorted(counts)]
+    )
+    await session.exec(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread": NotificationCounter.unread + stmt.excluded.unread},
+    ))
+
+
+async def mark_read(session: AsyncSession, user_id: int, *filters) -> int:
+    """
+    Mark the user's unread notifications matching `filters` as read and take
+    them off the counter, in the caller's transaction. Returns how many
+    changed; rows that were already read are never counted twice.
+    """
+    changed = (await session.exec(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False, *filters)  # noqa: E712
+        .values(is_read=True)
+    )).rowcount
+    if changed:
+        await session.exec(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread=NotificationCounter.unread - changed)
+        )
+    return changed
+
+
+async def unread_count(session: AsyncSession, user_id: int) -> int:
+    """Badge count: a primary-key lookup (read fresh, never from the identity map)."""
+    unread = (await session.exec(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    )).first()
+    return max(unread or 0, 0)
+
+
+async def missed(session: AsyncSession, user_id: int, after_seq: int, limit: int) -> list[Notification]:
+    """The user's notifications created or merged into after `after_seq`, in seq order, at most `limit`."""
+    return (await session.exec(
+        select(Notification)
+        .where(Notification.user_id == user_id, Notification.seq > after_seq)
+        .order_by(Notification.seq)
+        .limit(limit)
+    )).all()
+
+
+def push_payload(notification: Notification) -> dict:
+    """The WebSocket message for a stored notification, live or replayed."""
+    return {
+        "type": notification.kind,
+        "event_id": notification.event_id,
+        "notification_id": notification.id,
+        "seq": notification.seq,
+        "message": notification.message,
+        "count": notification.count,
+        "timestamp": notification.updated_at.isoformat(),
+    }
+
+
+def replay_payload(notification: Notification) -> dict:
+    """A stored notification as sent to a resuming WebSocket."""
+    return {**push_payload(notification), "replayed": True}
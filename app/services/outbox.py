@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_session, insert_ids
+from app.models.notification import Notification
+from app.models.outbox import OutboxMessage
+from app.services import inbox
+from app.services.broker import broker
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1.0"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+
+
+def enqueue(session: AsyncSession, kind: str, event_id: int | None, recipients, message: str, payload: dict):
+    """
+    Add an outbox row to the caller's transaction.
+
+    Nothing is persisted or pushed until the caller commits; call `wake()`
+    afterwards so the drainer picks it up without waiting for the next poll.
+    """
+    recipients = sorted(set(recipients))
+    if not recipients:
+        return
+    session.add(OutboxMessage(
+        kind=kind,
+        event_id=event_id,
+        recipients=recipients,
+        message=message,
+        payload={"type": kind, "event_id": event_id, **payload},
+    ))
+
+
+class OutboxDrainer:
+    """
+    Background task moving committed outbox rows to their destinations.
+
+    Each round has two steps, both in batches:
+      1. persist: coalesce pending messages into recent unread
+         notifications, bulk-insert the remaining `Notification` rows, bump
+         the recipients' unread counters and stamp the messages
+         `persisted_at`, all in the same transaction;
+      2. dispatch: push persisted messages through the notification broker, then
+         delete them.
+    A crash between push and delete re-sends the message on the next round,
+    so delivery is at-least-once. Failed rounds back off exponentially.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Nudge the drainer from any thread; a no-op before `start()`."""
+        if self.loop is None or self._wakeup is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # keep going while full batches come back
+                while await self.drain_once() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox drain failed")
+
+    async def drain_once(self) -> int:
+        """Run one persist + dispatch round; returns the number of rows handled."""
+        persisted = await self._persist_batch()
+        dispatched = await self._dispatch_batch()
+        return max(persisted, dispatched)
+
+    async def _persist_batch(self) -> int:
+        now = datetime.utcnow()
+        async with async_session() as session:
+            pending = (await session.exec(
+                select(OutboxMessage)
+                .where(OutboxMessage.persisted_at.is_(None), OutboxMessage.available_at <= now)
+                .order_by(OutboxMessage.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not pending:
+                return 0
+            attempts = {m.id: m.attempts for m in pending}
+            try:
+                rows = [
+                    {
+                        "user_id": user_id,
+                        "event_id": m.event_id,
+                        "kind": m.kind,
+                        "message": m.message,
+                        "count": 1,
+                        "is_read": False,
+                        "created_at": m.created_at,
+                        "updated_at": m.created_at,
+                    }
+                    for m in pending
+                    for user_id in m.recipients
+                ]
+                inserts, placed = await inbox.coalesce(session, rows)
+                if inserts:
+                    new_ids = await insert_ids(session, Notification, inserts)
+                    for row, notification_id in zip(inserts, new_ids):
+                        row["id"] = notification_id
+                    await inbox.add_unread(session, [row["user_id"] for row in inserts])
+
+                # remember which row each recipient got, for live pushes and resume
+                landed = iter(placed)
+                table = OutboxMessage.__table__
+                await session.exec(
+                    update(table)
+                    .where(table.c.id == bindparam("message_id"))
+                    .values(persisted_at=now, notification_ids=bindparam("landed_ids")),
+                    params=[
+                        {
+                            "message_id": m.id,
+                            "landed_ids": {str(user_id): next(landed)["id"] for user_id in m.recipients},
+                        }
+                        for m in pending
+                    ],
+                )
+                await session.commit()
+            except Exception as exc:
+                await session.rollback()
+                await self._backoff(session, attempts, exc)
+                raise
+            return len(pending)
+
+    async def _backoff(self, session: AsyncSession, attempts: dict[int, int], exc: Exception):
+        now = datetime.utcnow()
+        for message_id, attempt in attempts.items():
+            delay = min(2 ** attempt, OUTBOX_MAX_BACKOFF_SECONDS)
+            await session.exec(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message_id)
+                .values(
+                    attempts=OutboxMessage.attempts + 1,
+                    available_at=now + timedelta(seconds=delay),
+                    last_error=str(exc)[:500],
+                )
+            )
+        await session.commit()
+
+    async def _dispatch_batch(self) -> int:
+        async with async_session() as session:
+            messages = (await session.exec(
+                select(OutboxMessage)
+                .where(OutboxMessage.persisted_at.is_not(None))
+                .order_by(OutboxMessage.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not messages:
+                return 0
+            # the rows as stored now, so live pushes match what a resume replays
+            ids = {i for m in messages for i in (m.notification_ids or {}).values()}
+            stored = {}
+            if ids:
+                stored = {n.id: n for n in (await session.exec(
+                    select(Notification).where(Notification.id.in_(ids))
+                )).all()}
+            for m in messages:
+                landed = m.notification_ids or {}
+                for user_id in m.recipients:
+                    payload = m.payload
+                    notification = stored.get(landed.get(str(user_id)))
+                    if notification is not None:
+                        payload = {**payload, **inbox.push_payload(notification)}
+                    await broker.publish(user_id, payload)
+            await session.exec(
+                delete(OutboxMessage).where(OutboxMessage.id.in_([m.id for m in messages]))
+            )
+            await session.commit()
+            return len(messages)
+
+
+drainer = OutboxDrainer()
+
+
+def wake():
+    drainer.wake()
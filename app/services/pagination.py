@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """
+    Opaque keyset cursor for the last row of a page.
+
+    Datetimes are tagged so `decode_cursor` gives them back as datetimes.
+    """
+    raw = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Inverse of `encode_cursor`; raises 400 for anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in raw
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
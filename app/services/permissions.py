@@ -0,0 +1,136 @@
+import os
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.models.event import Event
+from app.models.permission import EventPermission
+from app.models.user import RoleEnum
+
+PERMISSION_CACHE_SIZE = int(os.getenv("PERMISSION_CACHE_SIZE", "50000"))
+# Other workers only see a revocation once their entry expires, so keep this short
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", "30"))
+
+# returned for (event, user) pairs where the event does not exist; never
+# cached, since the id may be created (here or by another worker) right after
+NO_EVENT = "no_event"
+
+OWNER = (RoleEnum.owner,)
+EDITORS = (RoleEnum.owner, RoleEnum.editor)
+VIEWERS = (RoleEnum.owner, RoleEnum.editor, RoleEnum.viewer)
+
+
+class PermissionResolver:
+    """
+    Answers "what role does user U have on event E" from an LRU/TTL cache.
+
+    Owners resolve to RoleEnum.owner, collaborators to their EventPermission
+    role and everyone else to None. Permission writes must call
+    `invalidate` so this process never serves a stale answer.
+    """
+
+    def __init__(self, maxsize: int = PERMISSION_CACHE_SIZE, ttl: float = PERMISSION_CACHE_TTL):
+        # (event_id, user_id) -> role, grouped by event for invalidate_events
+        self.cache = TTLCache(maxsize, ttl, group=lambda key: key[0])
+
+    async def role(self, session: AsyncSession, event_id: int, user_id: int) -> RoleEnum | None:
+        """Role of `user_id` on `event_id`; raises LookupError if the event is missing."""
+        cached = self.cache.get((event_id, user_id))
+        if cached is MISSING:
+            cached = (await self._load_event(session, event_id, [user_id]))[user_id]
+        if cached == NO_EVENT:
+            raise LookupError(event_id)
+        return cached
+
+    async def roles_for_user(self, session: AsyncSession, user_id: int, event_ids) -> dict[int, RoleEnum | None]:
+        """Roles of one user on many events; missing events are left out."""
+        result, todo = {}, []
+        for event_id in set(event_ids):
+            cached = self.cache.get((event_id, user_id))
+            if cached is MISSING:
+                todo.append(event_id)
+            else:
+                result[event_id] = cached
+        if todo:
+            rows = (await session.exec(
+                select(Event.id, Event.owner_id, EventPermission.role)
+                .outerjoin(
+                    EventPermission,
+                    and_(EventPermission.event_id == Event.id, EventPermission.user_id == user_id),
+                )
+                .where(Event.id.in_(todo))
+            )).all()
+            for event_id, owner_id, role in rows:
+                role = RoleEnum.owner if owner_id == user_id else role
+                self.cache.set((event_id, user_id), role)
+                result[event_id] = role
+        return result
+
+    async def roles_for_event(self, session: AsyncSession, event_id: int, user_ids) -> dict[int, RoleEnum | None]:
+        """Roles of many users on one event; raises LookupError if the event is missing."""
+        user_ids = set(user_ids)
+        result, todo = {}, []
+        for user_id in user_ids:
+            cached = self.cache.get((event_id, user_id))
+            if cached is MISSING:
+                todo.append(user_id)
+            else:
+                result[user_id] = cached
+        if todo:
+            loaded = await self._load_event(session, event_id, todo)
+            if NO_EVENT in loaded.values():
+                raise LookupError(event_id)
+            result.update(loaded)
+        return result
+
+    def invalidate(self, event_id: int, user_id: int | None = None):
+        """Forget one (event, user) pair, or every pair of the event."""
+        if user_id is not None:
+            self.cache.pop((event_id, user_id))
+        else:
+            self.cache.pop_groups([event_id])
+
+    def invalidate_events(self, event_ids):
+        """Forget every pair of several events; costs the pairs cached for them."""
+        self.cache.pop_groups(set(event_ids))
+
+    async def _load_event(self, session: AsyncSession, event_id: int, user_ids: list[int]) -> dict:
+        rows = (await session.exec(
+            select(Event.owner_id, EventPermission.user_id, EventPermission.role)
+            .outerjoin(
+                EventPermission,
+                and_(EventPermission.event_id == Event.id, EventPermission.user_id.in_(user_ids)),
+            )
+            .where(Event.id == event_id)
+        )).all()
+        if not rows:
+            return {user_id: NO_EVENT for user_id in user_ids}
+        owner_id = rows[0][0]
+        granted = {uid: role for _, uid, role in rows if uid is not None}
+        loaded = {
+            user_id: RoleEnum.owner if user_id == owner_id else granted.get(user_id)
+            for user_id in user_ids
+        }
+        for user_id, role in loaded.items():
+            self.cache.set((event_id, user_id), role)
+        return loaded
+
+
+resolver = PermissionResolver()
+
+
+async def require_role(session: AsyncSession, event_id: int, user_id: int, allowed, detail: str) -> RoleEnum:
+    """
+    Return the user's role on the event, raising 404 if the event does not
+    exist and 403 if the role is not in `allowed`.
+    """
+    try:
+        role = await resolver.role(session, event_id, user_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if role not in allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+    return role
@@ -0,0 +1,222 @@
+import calendar
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterator, NamedTuple
+
+# How far ahead a new recurring series is expanded when checking it against
+# existing one-off events. Existing series are always checked in closed form.
+RECURRENCE_HORIZON_DAYS = int(os.getenv("RECURRENCE_HORIZON_DAYS", "365"))
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+
+class Rule(NamedTuple):
+    freq: str
+    interval: int = 1
+    byday: tuple[int, ...] = ()
+    count: int | None = None
+    until: datetime | None = None
+    exdates: frozenset[datetime] = frozenset()
+
+
+def _parse_datetime(value: str) -> datetime:
+    # naive UTC, like the event times the rule is applied to
+    value = value.strip()
+    for fmt in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            return datetime.strptime(value.rstrip("Z"), fmt)
+        except ValueError:
+            pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(pattern: str) -> Rule:
+    """
+    Parse a `recurrence_pattern` into a Rule; raises ValueError if invalid.
+
+    Accepted forms:
+      * 'daily', 'weekly', 'monthly', 'yearly'
+      * RRULE text, e.g. 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=20251231T000000',
+        with an optional 'RRULE:' prefix and 'EXDATE=' for skipped occurrences
+      * JSON with the same keys in lower case, e.g. {"freq": "weekly", "count": 10}
+    """
+    text = pattern.strip()
+    if text.lower() in ("daily", "weekly", "monthly", "yearly"):
+        return Rule(freq=text.upper())
+
+    if text.startswith("{"):
+        try:
+            raw = {k.upper(): v for k, v in json.loads(text).items()}
+        except (json.JSONDecodeError, AttributeError):
+            raise ValueError("recurrence_pattern is not valid JSON")
+    else:
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+        raw = {}
+        for part in filter(None, text.split(";")):
+            key, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"Malformed recurrence rule part: {part!r}")
+            raw[key.strip().upper()] = value.strip()
+
+    def as_list(value):
+        return value if isinstance(value, list) else str(value).split(",")
+
+    freq = str(raw.get("FREQ", "")).upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = int(raw.get("INTERVAL", 1))
+    if interval < 1:
+        raise ValueError("INTERVAL must be positive")
+    byday = ()
+    if raw.get("BYDAY"):
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            byday = tuple(sorted({WEEKDAYS[d.strip().upper()] for d in as_list(raw["BYDAY"])}))
+        except KeyError:
+            raise ValueError("BYDAY must use MO, TU, WE, TH, FR, SA, SU")
+    count = int(raw["COUNT"]) if raw.get("COUNT") is not None else None
+    if count is not None and count < 1:
+        raise ValueError("COUNT must be positive")
+    until = _parse_datetime(str(raw["UNTIL"])) if raw.get("UNTIL") else None
+    exdates = frozenset(_parse_datetime(str(d)) for d in as_list(raw["EXDATE"])) if raw.get("EXDATE") else frozenset()
+    return Rule(freq, interval, byday, count, until, exdates)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    # days past the end of a short month are clamped to its last day
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def _starts_after(dtstart: datetime, rule: Rule, lo: datetime) -> Iterator[tuple[int, datetime]]:
+    """
+    Yield (position, start) of the occurrences starting after `lo`, in order.
+
+    The first position is computed directly from `lo`, so the cost does not
+    depend on how many occurrences precede it. COUNT/UNTIL/EXDATE are left
+    to the caller.
+    """
+    if rule.freq in ("MONTHLY", "YEARLY"):
+        step = rule.interval * (12 if rule.freq == "YEARLY" else 1)
+        months = (lo.year - dtstart.year) * 12 + lo.month - dtstart.month
+        k = max(0, months // step - 1)
+        while True:
+            start = _add_months(dtstart, k * step)
+            if start > lo:
+                yield k, start
+            k += 1
+
+    if rule.freq == "DAILY" or not rule.byday:
+        period = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+        k = (lo - dtstart) // period + 1 if lo >= dtstart else 0
+        while True:
+            yield k, dtstart + k * period
+            k += 1
+
+    # WEEKLY with BYDAY: one arithmetic progression per weekday. The series'
+    # own start is always its first occurrence.
+    offsets = sorted(set(rule.byday) | {dtstart.weekday()})
+    anchor = dtstart - timedelta(days=dtstart.weekday())
+    skipped = sum(1 for d in offsets if d < dtstart.weekday())
+    period = timedelta(weeks=rule.interval)
+    week = max(0, (lo - anchor) // period)
+    while True:
+        for j, d in enumerate(offsets):
+            start = anchor + week * period + timedelta(days=d)
+            if start >= dtstart and start > lo:
+                yield week * len(offsets) + j - skipped, start
+        week += 1
+
+
+def occurrences(dtstart: datetime, dtend: datetime, rule: Rule,
+                window_start: datetime, window_end: datetime) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Lazily yield (start, end) of each occurrence overlapping [window_start, window_end).
+    """
+    duration = dtend - dtstart
+    for position, start in _starts_after(dtstart, rule, window_start - duration):
+        if start >= window_end:
+            return
+        if rule.count is not None and position >= rule.count:
+            return
+        if rule.until is not None and start > rule.until:
+            return
+        if start in rule.exdates:
+            continue
+        yield start, start + duration
+
+
+def overlaps(dtstart: datetime, dtend: datetime, rule: Rule,
+             window_start: datetime, window_end: datetime) -> bool:
+    """True if any occurrence of the series overlaps [window_start, window_end)."""
+    return next(occurrences(dtstart, dtend, rule, window_start, window_end), None) is not None
+
+
+def series_end(dtstart: datetime, dtend: datetime, rule: Rule) -> datetime | None:
+    """End of the last occurrence, or None for a series that never ends."""
+    if rule.count is None and rule.until is None:
+        return None
+    duration = dtend - dtstart
+    last = None
+    if rule.count is not None:
+        # the occurrence at position count-1, found from its neighbourhood
+        if rule.freq in ("MONTHLY", "YEARLY"):
+            step = rule.interval * (12 if rule.freq == "YEARLY" else 1)
+            last = _add_months(dtstart, (rule.count - 1) * step)
+        elif rule.freq == "DAILY" or not rule.byday:
+            period = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+            last = dtstart + (rule.count - 1) * period
+        else:
+            per_week = len(set(rule.byday) | {dtstart.weekday()})
+            lo = dtstart + timedelta(weeks=rule.interval * ((rule.count - 1) // per_week - 1))
+            for position, start in _starts_after(dtstart, rule, max(lo, dtstart - timedelta(days=1))):
+                if position == rule.count - 1:
+                    last = start
+                    break
+    if rule.until is not None:
+        # the widest gap between two occurrences bounds how far back to look
+        gap = timedelta(days=rule.interval * {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 31, "YEARLY": 366}[rule.freq])
+        last_until = None
+        if rule.until >= dtstart:
+            for _, start in _starts_after(dtstart, rule, max(dtstart, rule.until - gap) - timedelta(microseconds=1)):
+                if start > rule.until:
+                    break
+                last_until = start
+        last_until = last_until or dtstart
+        last = min(last, last_until) if last is not None else last_until
+    return last + duration
+
+
+def series_end_for(start: datetime, end: datetime, is_recurring: bool, pattern: str | None) -> datetime | None:
+    """Value for `Event.recurrence_end`; None for one-off events and endless series."""
+    if not is_recurring or not pattern:
+        return None
+    return series_end(start, end, parse_rule(pattern))
+
+
+def check_window(start: datetime, end: datetime, pattern: str | None) -> list[tuple[datetime, datetime]]:
+    """
+    Intervals to check a new or moved event against.
+
+    One-off events give their own interval; a series is expanded up to
+    RECURRENCE_HORIZON_DAYS after its start (or its end, if sooner).
+    """
+    if not pattern:
+        return [(start, end)]
+    rule = parse_rule(pattern)
+    horizon = start + timedelta(days=RECURRENCE_HORIZON_DAYS)
+    last = series_end(start, end, rule)
+    if last is not None:
+        horizon = min(horizon, last)
+    return list(occurrences(start, end, rule, start, horizon)) or [(start, end)]
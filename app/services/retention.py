@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlmodel import select
+
+from app.core.database import async_session
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+# Read notifications untouched for this many days are deleted; 0 disables
+NOTIFICATION_RETENTION_DAYS = float(os.getenv("NOTIFICATION_RETENTION_DAYS", "30"))
+NOTIFICATION_PURGE_BATCH = int(os.getenv("NOTIFICATION_PURGE_BATCH", "1000"))
+NOTIFICATION_PURGE_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_PURGE_INTERVAL_SECONDS", "3600"))
+
+
+class NotificationPurger:
+    """
+    Background task deleting old read notifications.
+
+    Each chunk is its own short transaction over at most `batch_size` rows,
+    picked through ix_notification_read_updated with SKIP LOCKED, so the
+    purge never holds long locks or fights a concurrent purge in another
+    worker. Unread rows are kept whatever their age, so the unread counters
+    never change here.
+    """
+
+    def __init__(self, retention_days: float = NOTIFICATION_RETENTION_DAYS,
+                 batch_size: int = NOTIFICATION_PURGE_BATCH,
+                 interval_seconds: float = NOTIFICATION_PURGE_INTERVAL_SECONDS):
+        self.retention = timedelta(days=retention_days)
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.purged = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self.retention > timedelta(0):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification purge failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def purge(self) -> int:
+        """Delete everything past retention, chunk by chunk; returns the row count."""
+        cutoff = datetime.utcnow() - self.retention
+        total = 0
+        while True:
+            deleted = await self.purge_chunk(cutoff)
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            await asyncio.sleep(0)  # let requests in between chunks
+
+    async def purge_chunk(self, cutoff: datetime) -> int:
+        async with async_session() as session:
+            ids = (await session.exec(
+                select(Notification.id)
+                .where(Notification.is_read == True, Notification.updated_at < cutoff)  # noqa: E712
+                .order_by(Notification.updated_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not ids:
+                return 0
+            await session.exec(delete(Notification).where(Notification.id.in_(ids)))
+            await session.commit()
+        self.purged += len(ids)
+        return len(ids)
+
+
+purger = NotificationPurger()
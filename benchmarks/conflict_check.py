@@ -0,0 +1,143 @@
+"""
+Conflict-check latency as one owner's event count grows.
+
+Runs fully offline against an in-memory SQLite database (aiosqlite):
+
+    python -m benchmarks.conflict_check --sizes 1000 10000 50000
+
+For every size it times the original overlap scan (every event index
+dropped), the indexed range query in app/services/conflicts.py and the
+in-process interval index. Probes fall in free slots in the last tenth of
+the calendar.
+
+One run (Python 3.11, SQLite 3.40, 500 probes), p50 in microseconds:
+
+    events   legacy   indexed   memory
+      1000      891      1717      797
+     10000     3167      3488     1004
+     50000    14038     11913      980
+
+The indexed query is a one-sided range scan (start_time < hi, or
+end_time > lo), so with bound parameters SQLite walks every event on the
+side it picks and grows with the owner's history much like the legacy
+scan; at small sizes its second (series) query makes it slower. Only the
+in-process index stays flat.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from random import Random
+
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.models.user import User
+from app.services import conflicts
+
+BASE = datetime(2024, 1, 1)
+
+
+async def _legacy_check(session, owner_id, start, end):
+    # the pre-index query: first match of an unbounded overlap scan
+    return (await session.exec(
+        select(Event).where(
+            Event.owner_id == owner_id,
+            Event.start_time < end,
+            Event.end_time > start,
+        )
+    )).first()
+
+
+async def _seed(session, owner_id, count):
+    rows = [
+        {
+            "title": f"event {i}",
+            "description": "benchmark",
+            "start_time": BASE + timedelta(hours=2 * i),
+            "end_time": BASE + timedelta(hours=2 * i + 1),
+            "is_recurring": False,
+            "owner_id": owner_id,
+        }
+        for i in range(count)
+    ]
+    await session.exec(insert(Event), params=rows)
+    await session.commit()
+
+
+async def _time(fn, probes):
+    samples = []
+    for start, end in probes:
+        t0 = time.perf_counter()
+        await fn(start, end)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+async def run(size, probes_count, with_index):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        if not with_index:
+            # the original schema had no index on event at all
+            for index in Event.__table__.indexes:
+                await conn.exec_driver_sql(f"DROP INDEX {index.name}")
+
+    try:
+        rng = Random(size)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            owner = User(username="bench", email="bench@example.com", hashed_password="x")
+            session.add(owner)
+            await session.commit()
+            await _seed(session, owner.id, size)
+
+            # probe the free gaps near the end of the calendar: the worst case for
+            # the legacy scan, which has to walk every earlier event
+            probes = []
+            for _ in range(probes_count):
+                slot = rng.randrange(int(size * 0.9), size)
+                start = BASE + timedelta(hours=2 * slot + 1, minutes=10)
+                probes.append((start, start + timedelta(minutes=30)))
+
+            if not with_index:
+                return {"legacy": await _time(lambda s, e: _legacy_check(session, owner.id, s, e), probes)}
+
+            results = {}
+            conflicts.CONFLICT_INDEX = "db"
+            results["indexed"] = await _time(
+                lambda s, e: conflicts.find_conflicts(session, owner.id, s, e), probes
+            )
+            conflicts.CONFLICT_INDEX = "memory"
+            conflicts.interval_index.clear()
+            await conflicts.interval_index.load(session, owner.id)
+            results["memory"] = await _time(
+                lambda s, e: conflicts.find_conflicts(session, owner.id, s, e), probes
+            )
+            return results
+    finally:
+        # aiosqlite's worker thread would otherwise keep the process alive
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--probes", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'strategy':>9} {'p50 us':>10} {'p99 us':>10}")
+    for size in args.sizes:
+        results = asyncio.run(run(size, args.probes, with_index=False))
+        results.update(asyncio.run(run(size, args.probes, with_index=True)))
+        for name, (p50, p99) in results.items():
+            print(f"{size:>8} {name:>9} {p50:>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
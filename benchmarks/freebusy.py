@@ -0,0 +1,111 @@
+"""
+Free/busy lookup for many participants versus one conflict query each.
+
+Runs fully offline against an in-memory SQLite database (aiosqlite):
+
+    python -m benchmarks.freebusy --users 10 50 200 --events 2000
+
+Every user gets `--events` one-hour events spread over a year. For each
+participant count it times app/services/freebusy.py (one query plus the
+sweep) against a loop of `find_conflicts` calls, the per-user approach
+scheduling had before, over a one-week window.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from random import Random
+
+from sqlalchemy import event as sa_event, insert
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.models.user import User
+from app.services import conflicts, freebusy
+
+BASE = datetime(2024, 1, 1)
+
+
+async def _seed(session, users, per_user, rng):
+    session.add_all([
+        User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(users)
+    ])
+    await session.commit()
+    rows = []
+    for owner_id in range(1, users + 1):
+        hours = sorted(rng.sample(range(24 * 365), per_user))
+        rows += [
+            {
+                "title": "busy",
+                "description": "benchmark",
+                "start_time": BASE + timedelta(hours=h),
+                "end_time": BASE + timedelta(hours=h + 1),
+                "is_recurring": False,
+                "owner_id": owner_id,
+            }
+            for h in hours
+        ]
+    await session.exec(insert(Event), params=rows)
+    await session.commit()
+
+
+async def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+async def run(users, per_user, repeat):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    statements = []
+    sa_event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await _seed(session, users, per_user, Random(users))
+            user_ids = list(range(1, users + 1))
+            start = BASE + timedelta(days=180)
+            end = start + timedelta(days=7)
+
+            async def sweep():
+                await freebusy.freebusy(session, user_ids, start, end, timedelta(minutes=30))
+
+            async def per_user_checks():
+                for user_id in user_ids:
+                    await conflicts.find_conflicts(session, user_id, start, end)
+
+            results = {}
+            for name, fn in (("freebusy", sweep), ("per-user", per_user_checks)):
+                statements.clear()
+                await fn()
+                queries = len(statements)
+                results[name] = (await _time(fn, repeat), queries)
+            return results
+    finally:
+        # aiosqlite's worker thread would otherwise keep the process alive
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--events", type=int, default=2000, help="events per user")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'users':>6} {'strategy':>9} {'queries':>8} {'p50 ms':>9}")
+    for users in args.users:
+        for name, (p50, queries) in asyncio.run(run(users, args.events, args.repeat)).items():
+            print(f"{users:>6} {name:>9} {queries:>8} {p50:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
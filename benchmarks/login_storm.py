@@ -0,0 +1,118 @@
+"""
+Event-read latency while a storm of logins is in flight.
+
+Runs the app in-process against a throwaway SQLite file:
+
+    python -m benchmarks.login_storm --logins 64 --duration 10
+
+The baseline runs bcrypt on the shared threadpool with no admission limit,
+which is how login worked before the dedicated pool. The second run uses
+the process pool from app/core/security.py. Refused logins (503) are
+counted rather than retried.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "login_storm.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+CREDENTIALS = {"username": "storm", "email": "storm@example.com", "password": "storm-password"}
+
+
+def _percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+async def _storm(client, stop, counts):
+    while not stop.is_set():
+        r = await client.post("/api/auth/login", json=CREDENTIALS)
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+
+
+async def _reader(client, headers, event_id, stop, samples):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.get(f"/api/events/{event_id}", headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200, r.text
+
+
+async def run(logins, readers, duration, use_pool):
+    import httpx
+    from app.core import security
+    from app.main import app
+
+    security.hasher.shutdown()
+    security.hasher = security.PasswordHasher(
+        workers=security.BCRYPT_POOL_SIZE if use_pool else 0,
+        max_pending=security.BCRYPT_MAX_PENDING if use_pool else 10**9,
+    )
+    # the router bound the name at import time
+    import app.routers.auth as auth_router
+    auth_router.hasher = security.hasher
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json=CREDENTIALS)
+        token = (await client.post("/api/auth/login", json=CREDENTIALS)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        event = await client.post("/api/events/", headers=headers, json={
+            "title": "read me", "description": "benchmark",
+            # one event per run; the user and database are shared between runs
+            "start_time": f"2024-01-0{1 + use_pool}T10:00:00", "end_time": f"2024-01-0{1 + use_pool}T11:00:00",
+        })
+        event_id = event.json()["id"]
+
+        stop, samples, counts = asyncio.Event(), [], {}
+        tasks = [asyncio.create_task(_storm(client, stop, counts)) for _ in range(logins)]
+        tasks += [asyncio.create_task(_reader(client, headers, event_id, stop, samples)) for _ in range(readers)]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    security.hasher.shutdown()
+    samples.sort()
+    return {
+        "reads": len(samples),
+        "p50": statistics.median(samples),
+        "p99": _percentile(samples, 0.99),
+        "logins": counts,
+    }
+
+
+async def _on_app(coro):
+    from app.main import app
+    # run startup/shutdown (tables, outbox drainer) around the scenario
+    await app.router.startup()
+    try:
+        return await coro
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login loops")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent event-read loops")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    args = parser.parse_args()
+
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    for label, use_pool in (("shared threadpool", False), ("process pool", True)):
+        result = asyncio.run(_on_app(run(args.logins, args.readers, args.duration, use_pool)))
+        print(
+            f"{label:>18}: {result['reads']:>6} reads  "
+            f"p50 {result['p50']:8.2f} ms  p99 {result['p99']:8.2f} ms  "
+            f"logins {dict(sorted(result['logins'].items()))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
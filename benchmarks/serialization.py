@@ -0,0 +1,89 @@
+"""
+Payload size and encode/decode time of the supported wire formats.
+
+Runs offline, no database needed:
+
+    python -m benchmarks.serialization --events 1000
+
+Two payloads are measured: a `POST /api/events/batch` body and a
+`GET /api/events` page, both with `--events` events. "json" is FastAPI's
+previous default path (jsonable_encoder + json.dumps), "orjson" is the
+default response class now and "msgpack" is what `application/msgpack`
+clients send and receive. Sizes are also given gzip-compressed.
+"""
+import argparse
+import gzip
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import msgpack
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.core.negotiation import packb
+
+BASE = datetime(2024, 1, 1, 9)
+
+
+def _event(i, with_id):
+    start = BASE + timedelta(hours=2 * i)
+    event = {
+        "title": f"Design review #{i}",
+        "description": "Walk through the open comments on the calendar sync proposal.",
+        "start_time": start,
+        "end_time": start + timedelta(hours=1),
+        "location": "Room 4.12" if i % 3 else None,
+        "is_recurring": i % 10 == 0,
+        "recurrence_pattern": "FREQ=WEEKLY;BYDAY=MO,WE" if i % 10 == 0 else None,
+    }
+    if with_id:
+        event = {"id": 100000 + i, **event, "owner_id": 42}
+    return event
+
+
+FORMATS = {
+    "json": (
+        lambda payload: json.dumps(jsonable_encoder(payload)).encode(),
+        json.loads,
+    ),
+    "orjson": (orjson.dumps, orjson.loads),
+    "msgpack": (packb, lambda data: msgpack.unpackb(data, raw=False)),
+}
+
+
+def _time(fn, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = {
+        "batch body": {"events": [_event(i, with_id=False) for i in range(args.events)]},
+        "listing": {
+            "items": [_event(i, with_id=True) for i in range(args.events)],
+            "next_cursor": "eyJ2IjogWzE3MDQwOTk2MDAsIDEwMDk5OV19",
+        },
+    }
+    print(f"{'payload':>10} {'format':>8} {'bytes':>9} {'gzip':>8} {'encode ms':>10} {'decode ms':>10}")
+    for name, payload in payloads.items():
+        for fmt, (encode, decode) in FORMATS.items():
+            data = encode(payload)
+            print(
+                f"{name:>10} {fmt:>8} {len(data):>9} {len(gzip.compress(data)):>8} "
+                f"{_time(encode, payload, args.repeat):>10.2f} {_time(decode, data, args.repeat):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
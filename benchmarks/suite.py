@@ -0,0 +1,388 @@
+"""
+Latency and throughput of the API's main paths, in-process and offline.
+
+Seeds a synthetic dataset (benchmarks/datagen.py), starts the app (outbox
+drainer and broker included) and drives it through httpx's ASGI transport,
+so no server or network is involved:
+
+    python -m benchmarks.suite --users 50 --events 200 --requests 300 --concurrency 8 \\
+        --output results.json
+
+Scenarios: create, batch, update, share, changelog, diff and ws_fanout.
+ws_fanout updates an event shared with `--listeners` users holding a
+WebSocket each and times the request plus delivery to every socket; it runs
+one update at a time so each delivery can be attributed. Every scenario
+reports p50/p95/p99 and mean latency in ms and throughput in requests/s.
+
+By default a throwaway SQLite file is used. `--database-url` points the run
+at another database, e.g. a local Postgres; ITS TABLES ARE DROPPED.
+
+A run fails (exit status 1) when any request errors, when a `--fail-on`
+limit is crossed (`update.p95_ms=50`, `create.throughput=200`: latencies
+are upper bounds, throughput a lower bound), or, with `--baseline`, when a
+scenario's p95 or throughput is more than `--max-regression` worse than in
+the saved results of an earlier run.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from random import Random
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_suite.db")
+
+# scenario events start here, clear of the seeded 2024 calendar
+BENCH_START = datetime(2030, 1, 1)
+SCENARIOS = ("create", "batch", "update", "share", "changelog", "diff", "ws_fanout")
+LATENCIES = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+
+def _percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def summarize(samples: list[float], errors: int, wall: float) -> dict:
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(_percentile(samples, 0.95), 3),
+        "p99_ms": round(_percentile(samples, 0.99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "throughput": round(len(samples) / wall, 1) if wall > 0 else 0.0,
+    }
+
+
+class FakeSocket:
+    """Stands in for an accepted WebSocket; counts what the dispatcher sends."""
+
+    def __init__(self):
+        self.received = 0
+        self.changed = asyncio.Event()
+
+    async def send_text(self, message: str):
+        self.received += 1
+        self.changed.set()
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class Context:
+    """Shared state of a run: the client, the dataset and a source of free time slots."""
+
+    def __init__(self, client, data, rng: Random, batch_size: int, listeners: int):
+        from app.core.security import create_access_token
+
+        self.client = client
+        self.data = data
+        self.rng = rng
+        self.batch_size = batch_size
+        self.listeners = listeners
+        self.headers = {
+            user_id: {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+            for user_id in data.user_ids
+        }
+        # one global counter: no two scenario events ever share an hour
+        self.slots = itertools.count()
+        self.owned = [(owner, event_id) for owner, ids in data.events.items() for event_id in ids]
+        owners = {event_id: owner for owner, event_id in self.owned}
+        self.versioned = [(owners[event_id], event_id, count) for event_id, count in data.versions.items()]
+
+    def slot(self) -> tuple[str, str]:
+        start = BENCH_START + timedelta(hours=2 * next(self.slots))
+        return start.isoformat(), (start + timedelta(hours=1)).isoformat()
+
+
+def _check(response, *expected):
+    if response.status_code not in (expected or (200,)):
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: "
+                           f"{response.status_code} {response.text[:200]}")
+
+
+async def scenario_create(ctx: Context):
+    async def op():
+        user_id = ctx.rng.choice(ctx.data.user_ids)
+        start, end = ctx.slot()
+        _check(await ctx.client.post("/api/events/", headers=ctx.headers[user_id], json={
+            "title": "bench create", "description": "suite", "start_time": start, "end_time": end,
+        }))
+    return op
+
+
+async def scenario_batch(ctx: Context):
+    async def op():
+        user_id = ctx.rng.choice(ctx.data.user_ids)
+        events = []
+        for _ in range(ctx.batch_size):
+            start, end = ctx.slot()
+            events.append({"title": "bench batch", "description": "suite", "start_time": start, "end_time": end})
+        _check(await ctx.client.post("/api/events/batch", headers=ctx.headers[user_id], json={"events": events}))
+    return op
+
+
+async def scenario_update(ctx: Context):
+    counter = itertools.count()
+
+    async def op():
+        owner, event_id = ctx.rng.choice(ctx.owned)
+        _check(await ctx.client.put(f"/api/events/{event_id}", headers=ctx.headers[owner],
+                                    json={"title": f"bench update {next(counter)}"}))
+    return op
+
+
+async def scenario_share(ctx: Context):
+    async def op():
+        owner, event_id = ctx.rng.choice(ctx.owned)
+        others = [u for u in ctx.rng.sample(ctx.data.user_ids, min(4, len(ctx.data.user_ids))) if u != owner][:3]
+        _check(await ctx.client.post(f"/api/events/{event_id}/share", headers=ctx.headers[owner], json=[
+            {"user_id": user_id, "role": ctx.rng.choice(("editor", "viewer"))} for user_id in others
+        ]))
+    return op
+
+
+async def scenario_changelog(ctx: Context):
+    if not ctx.versioned:
+        return None
+
+    async def op():
+        owner, event_id, _ = ctx.rng.choice(ctx.versioned)
+        _check(await ctx.client.get(f"/api/events/{event_id}/changelog", headers=ctx.headers[owner]))
+    return op
+
+
+async def scenario_diff(ctx: Context):
+    if not ctx.versioned or min(count for _, _, count in ctx.versioned) < 2:
+        return None
+
+    async def op():
+        owner, event_id, count = ctx.rng.choice(ctx.versioned)
+        # the diff cache serves repeats; with many events most pairs are new
+        a, b = sorted(ctx.rng.sample(range(1, count + 1), 2))
+        _check(await ctx.client.get(f"/api/events/{event_id}/diff", headers=ctx.headers[owner],
+                                    params={"from_version": a, "to_version": b}))
+    return op
+
+
+async def scenario_ws_fanout(ctx: Context):
+    from app.services.dispatcher import dispatcher
+
+    owner = ctx.data.user_ids[0]
+    listeners = [u for u in ctx.data.user_ids if u != owner][:ctx.listeners]
+    if not listeners:
+        return None
+    start, end = ctx.slot()
+    created = await ctx.client.post("/api/events/", headers=ctx.headers[owner], json={
+        "title": "bench fan-out", "description": "suite", "start_time": start, "end_time": end,
+    })
+    _check(created)
+    event_id = created.json()["id"]
+    _check(await ctx.client.post(f"/api/events/{event_id}/share", headers=ctx.headers[owner], json=[
+        {"user_id": user_id, "role": "viewer"} for user_id in listeners
+    ]))
+    # let the share notifications go out before any socket is listening
+    await asyncio.sleep(0.2)
+    sockets = [FakeSocket() for _ in listeners]
+    for user_id, socket in zip(listeners, sockets):
+        await dispatcher.connect(user_id, socket)
+    counter = itertools.count(1)
+
+    async def op():
+        n = next(counter)
+        _check(await ctx.client.put(f"/api/events/{event_id}", headers=ctx.headers[owner],
+                                    json={"title": f"bench fan-out {n}"}))
+        for socket in sockets:
+            while socket.received < n:
+                socket.changed.clear()
+                await asyncio.wait_for(socket.changed.wait(), timeout=10)
+
+    op.serial = True
+    return op
+
+
+async def _measure(op, count: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await op()
+    samples, errors = [], [0]
+    remaining = iter(range(count))
+
+    async def worker():
+        for _ in remaining:
+            t0 = time.perf_counter()
+            try:
+                await op()
+            except Exception as exc:
+                errors[0] += 1
+                if errors[0] == 1:
+                    print(f"  first error: {exc}", file=sys.stderr)
+                continue
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    workers = 1 if getattr(op, "serial", False) else concurrency
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    wall = time.perf_counter() - t0
+    if not samples:
+        return {"requests": 0, "errors": errors[0]}
+    return summarize(samples, errors[0], wall)
+
+
+async def run(args) -> dict:
+    import httpx
+    from sqlmodel import SQLModel
+    from app.core.database import async_session, engine
+    from app.main import app
+    from benchmarks.datagen import generate
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await app.router.startup()
+    try:
+        t0 = time.perf_counter()
+        async with async_session() as session:
+            data = await generate(session, args.users, args.events, args.shares, args.versions,
+                                  args.versioned, args.seed)
+        print(f"seeded {len(data.user_ids)} users, {data.event_count} events in {time.perf_counter() - t0:.1f}s")
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            ctx = Context(client, data, Random(args.seed), args.batch_size, args.listeners)
+            for name in args.scenarios:
+                op = await globals()[f"scenario_{name}"](ctx)
+                if op is None:
+                    print(f"{name:>10}: skipped, the dataset has nothing to run it on")
+                    continue
+                results[name] = await _measure(op, args.requests, args.concurrency, args.warmup)
+                _print_row(name, results[name])
+        return results
+    finally:
+        await app.router.shutdown()
+
+
+def _print_row(name: str, r: dict):
+    if not r.get("requests"):
+        print(f"{name:>10}: every request failed ({r['errors']} errors)")
+        return
+    print(f"{name:>10}: {r['requests']:>6} req  p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  "
+          f"p99 {r['p99_ms']:8.2f} ms  {r['throughput']:8.1f} req/s  errors {r['errors']}")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_limits(specs: list[str]) -> dict[tuple[str, str], float]:
+    limits = {}
+    for spec in specs:
+        try:
+            key, value = spec.split("=", 1)
+            scenario, metric = key.split(".", 1)
+            limits[(scenario, metric)] = float(value)
+        except ValueError:
+            raise SystemExit(f"bad --fail-on limit {spec!r}, expected SCENARIO.METRIC=VALUE")
+        if metric not in LATENCIES + ("throughput",):
+            raise SystemExit(f"unknown metric {metric!r} in --fail-on")
+    return limits
+
+
+def check(results: dict, limits: dict[tuple[str, str], float], baseline: dict | None,
+          max_regression: float) -> list[str]:
+    """Every way `results` fails the run, as messages; empty when it passes."""
+    failures = []
+    for name, r in results.items():
+        if r["errors"]:
+            failures.append(f"{name}: {r['errors']} failed requests")
+    for (name, metric), limit in limits.items():
+        value = results.get(name, {}).get(metric)
+        if value is None:
+            failures.append(f"{name}.{metric}: not measured")
+        elif metric == "throughput" and value < limit:
+            failures.append(f"{name}.throughput: {value} req/s is below {limit}")
+        elif metric != "throughput" and value > limit:
+            failures.append(f"{name}.{metric}: {value} ms is above {limit}")
+    for name, old in (baseline or {}).items():
+        new = results.get(name)
+        if not new or not new.get("requests") or not old.get("requests"):
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}.p95_ms: {old['p95_ms']} -> {new['p95_ms']} ms")
+        if new["throughput"] < old["throughput"] * (1 - max_regression):
+            failures.append(f"{name}.throughput: {old['throughput']} -> {new['throughput']} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--events", type=int, default=100, help="seeded events per user")
+    parser.add_argument("--shares", type=int, default=2, help="users each seeded event is shared with")
+    parser.add_argument("--versions", type=int, default=10, help="versions per versioned event")
+    parser.add_argument("--versioned", type=float, default=0.2, help="fraction of seeded events with a history")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--batch-size", type=int, default=20, help="events per batch request")
+    parser.add_argument("--listeners", type=int, default=25, help="sockets receiving each ws_fanout update")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="database to run against (wiped); default: a temporary SQLite file")
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed fractional p95/throughput regression against --baseline")
+    parser.add_argument("--fail-on", nargs="*", default=[], metavar="SCENARIO.METRIC=VALUE")
+    args = parser.parse_args()
+    limits = parse_limits(args.fail_on)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
+        os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+
+    results = asyncio.run(run(args))
+    from app.core.database import engine
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "database": engine.url.get_backend_name(),
+            "python": platform.python_version(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "fail_on", "database_url")},
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check(results, limits, baseline, args.max_regression)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
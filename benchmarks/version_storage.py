@@ -0,0 +1,96 @@
+"""
+On-disk size and lookup latency of an event's version history.
+
+Runs offline against a throwaway SQLite file (aiosqlite):
+
+    python -m benchmarks.version_storage --versions 5000 --interval 20
+
+Each update only renames the event, the common case for long histories.
+The same history is stored once as full snapshots (the pre-delta format,
+interval 1) and once delta-encoded with the given keyframe interval.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from random import Random
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.models.user import User
+from app.models.version import EventVersion
+from app.services import history
+
+DESCRIPTION = "Quarterly planning session. " * 40
+
+
+async def run(path, versions, interval, probes):
+    if os.path.exists(path):
+        os.remove(path)
+    history.VERSION_KEYFRAME_INTERVAL = interval
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            owner = User(username="bench", email="bench@example.com", hashed_password="x")
+            session.add(owner)
+            await session.commit()
+            event = Event(
+                title="v0", description=DESCRIPTION, location="Room 101",
+                start_time=datetime(2024, 1, 1, 10), end_time=datetime(2024, 1, 1, 11), owner_id=owner.id,
+            )
+            session.add(event)
+            await session.commit()
+            for n in range(1, versions + 1):
+                before = history.snapshot(event)
+                event.title = f"v{n}"
+                history.record_version(session, event, before, owner.id)
+                if n % 500 == 0:
+                    await session.commit()
+            await session.commit()
+
+            ids = (await session.exec(select(EventVersion.id))).all()
+            rng = Random(versions)
+            samples = []
+            for _ in range(probes):
+                t0 = time.perf_counter()
+                await history.load_version(session, event.id, rng.choice(ids))
+                samples.append((time.perf_counter() - t0) * 1000)
+
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("VACUUM")
+            pages = (await conn.exec_driver_sql(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = 'eventversion'"
+            )).scalar()
+    finally:
+        await engine.dispose()
+        if os.path.exists(path):
+            os.remove(path)
+    samples.sort()
+    return pages, statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=5000)
+    parser.add_argument("--interval", type=int, default=20, help="keyframe interval of the delta run")
+    parser.add_argument("--probes", type=int, default=300)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "version_storage.db")
+    print(f"{'format':>10} {'table KiB':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, interval in (("snapshots", 1), (f"delta/{args.interval}", args.interval)):
+        size, p50, p99 = asyncio.run(run(path, args.versions, interval, args.probes))
+        print(f"{label:>10} {size / 1024:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# app.core.database builds its engine at import time, so this runs first
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("BCRYPT_POOL_SIZE", "0")
+
+pytest_plugins = ["plugins.query_guard"]
+
+_user_ids = itertools.count(1)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Returns a factory of (user id, auth headers); users are inserted directly, skipping bcrypt."""
+    from sqlmodel import Session, create_engine
+
+    from app.core.security import create_access_token
+    from app.models.user import User
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+
+    def make() -> tuple[int, dict]:
+        n = next(_user_ids)
+        with Session(engine) as session:
+            user = User(username=f"user{n}", email=f"user{n}@example.com", hashed_password="!")
+            session.add(user)
+            session.commit()
+            token = create_access_token(data={"sub": str(user.id)})
+            return user.id, {"Authorization": f"Bearer {token}"}
+
+    yield make
+    engine.dispose()
@@ -0,0 +1,97 @@
+"""
+pytest plugin exposing the `query_guard` fixture, on top of the app's
+QueryGuard (app/core/query_guard.py). Enable it from tests/conftest.py:
+
+    pytest_plugins = ["plugins.query_guard"]
+
+    def test_batch_create_is_set_based(client, headers, query_guard):
+        query_guard.assert_constant(
+            lambda n: client.post("/api/events/batch", headers=headers, json=batch_of(n)),
+            sizes=(1, 50),
+        )
+
+Every request made while the fixture is active is recorded; the test fails
+at teardown when any of them went over its route's budget.
+"""
+from collections import Counter
+from typing import Callable, Iterable
+
+import pytest
+
+from app.core.query_guard import Report, guard
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.reports: list[Report] = []
+        # set False to only collect reports without failing on budgets
+        self.strict = True
+
+    def __call__(self, report: Report):
+        self.reports.append(report)
+
+    @property
+    def last(self) -> Report:
+        return self.reports[-1]
+
+    def budget(self, method: str, route: str, **limits):
+        """Override a route's budget for this test only."""
+        guard.budget(method, route, **limits)
+
+    def violations(self) -> list[str]:
+        return [
+            f"{r.method} {r.route or r.path}: {v}"
+            for r in self.reports for v in r.violations()
+        ]
+
+    def assert_within_budget(self):
+        found = self.violations()
+        if found:
+            pytest.fail("Query budget exceeded:\n" + "\n".join(found), pytrace=False)
+
+    def assert_constant(self, call: Callable[[int], object], sizes: Iterable[int] = (1, 10), slack: int = 0):
+        """
+        Call `call(n)` for each payload size and fail when the requests it
+        makes at the largest size issue more statements than at the smallest
+        (beyond `slack`), naming the statements that grew. One uncounted
+        call at the smallest size warms the caches first.
+        """
+        sizes = sorted(sizes)
+        call(sizes[0])
+        counts = {}
+        for size in sizes:
+            start = len(self.reports)
+            call(size)
+            made = self.reports[start:]
+            if not made:
+                pytest.fail(f"call({size}) made no request through the app", pytrace=False)
+            counts[size] = sum((r.statements for r in made), Counter())
+        totals = {size: sum(s.values()) for size, s in counts.items()}
+        smallest, largest = sizes[0], sizes[-1]
+        if totals[largest] - totals[smallest] <= slack:
+            return
+        grown = [
+            f"  {counts[smallest][sql]} -> {count}x {sql[:300]}"
+            for sql, count in counts[largest].most_common()
+            if count > counts[smallest][sql]
+        ]
+        pytest.fail(
+            "Statement count grows with payload size: "
+            + ", ".join(f"n={size}: {total}" for size, total in totals.items())
+            + "\n" + "\n".join(grown),
+            pytrace=False,
+        )
+
+
+@pytest.fixture
+def query_guard():
+    recorder = QueryRecorder()
+    budgets = dict(guard.budgets)
+    guard.listeners.append(recorder)
+    try:
+        yield recorder
+    finally:
+        guard.listeners.remove(recorder)
+        guard.budgets = budgets
+    if recorder.strict:
+        recorder.assert_within_budget()
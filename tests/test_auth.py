@@ -0,0 +1,24 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+def test_deactivate_locks_the_user_out_at_once(client, make_user):
+    from app.core.security import create_access_token
+
+    user_id, headers = make_user()
+    # a second session of the same user, whose token is not revoked
+    other = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id), 'device': 'other'})}"}
+    assert client.get("/api/events/", headers=other).status_code == 200  # principal now cached
+
+    assert client.post("/api/auth/deactivate", headers=headers).status_code == 204
+    assert client.get("/api/events/", headers=headers).status_code == 401
+    response = client.get("/api/events/", headers=other)
+    assert (response.status_code, response.json()["detail"]) == (401, "Inactive user")
+
+
+def test_websocket_token_only_from_header(client, make_user):
+    _, headers = make_user()
+    token = headers["Authorization"].split(" ", 1)[1]
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/ws/notifications?token={token}") as ws:
+            ws.receive_text()
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+
+def event(title: str, start: datetime, minutes: int = 30) -> dict:
+    return {
+        "title": title, "description": "d",
+        "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+    }
+
+
+def test_batch_create_is_one_insert_in_payload_order(client, make_user, query_guard):
+    _, headers = make_user()
+    base = datetime(2050, 1, 1)
+    payload = [event(f"e{i}", base + timedelta(hours=i)) for i in range(200)]
+
+    response = client.post("/api/events/batch", headers=headers, json={"events": payload})
+    assert response.status_code == 200, response.text
+    inserts = {sql: count for sql, count in query_guard.last.statements.items() if sql.startswith("INSERT INTO event ")}
+    assert list(inserts.values()) == [1]
+
+    created = response.json()
+    assert [e["title"] for e in created] == [e["title"] for e in payload]
+    for item in (created[0], created[99], created[-1]):
+        stored = client.get(f"/api/events/{item['id']}", headers=headers).json()
+        assert (stored["title"], stored["start_time"]) == (item["title"], item["start_time"])
+
+
+def test_batch_create_lists_every_conflict(client, make_user):
+    _, headers = make_user()
+    base = datetime(2050, 1, 1)
+    response = client.post("/api/events/batch", headers=headers, json={"events": [event("stored", base)]})
+    assert response.status_code == 200, response.text
+    stored_id = response.json()[0]["id"]
+
+    response = client.post("/api/events/batch", headers=headers, json={"events": [
+        event("a", base + timedelta(hours=2), 60),
+        event("b", base + timedelta(hours=2, minutes=30)),
+        event("c", base + timedelta(minutes=15)),
+        event("d", base + timedelta(hours=5)),
+    ]})
+    assert response.status_code == 409, response.text
+    conflicts = response.json()["detail"]["conflicts"]
+    assert {"index": 0, "with_index": 1} in conflicts
+    assert [(c["index"], c["event_id"]) for c in conflicts if "event_id" in c] == [(2, stored_id)]
+    assert len(conflicts) == 2
+
+
+def test_series_past_the_last_date_is_rejected_with_422(client, make_user):
+    _, headers = make_user()
+    endless = {**event("yearly", datetime(2050, 6, 1)), "is_recurring": True, "recurrence_pattern": "FREQ=YEARLY;COUNT=100000"}
+
+    assert client.post("/api/events/", headers=headers, json=endless).status_code == 422
+    response = client.post("/api/events/batch", headers=headers, json={"events": [event("ok", datetime(2050, 7, 1)), endless]})
+    assert response.status_code == 422, response.text
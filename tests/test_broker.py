@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services.broker import LocalBroker, UnixSocketBroker
+from app.services.dispatcher import NotificationDispatcher
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSocket:
+    """Stands in for an accepted WebSocket; keeps what the dispatcher sends."""
+
+    def __init__(self):
+        self.messages: list[str] = []
+
+    async def send_text(self, message: str):
+        self.messages.append(message)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class ClosedSocket(FakeSocket):
+    async def send_text(self, message: str):
+        raise RuntimeError("Cannot call send once a close message has been sent")
+
+
+async def until(predicate, timeout: float = 2.0):
+    """Let the loop run writers and socket readers until `predicate()` holds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+async def idle():
+    await asyncio.sleep(0.05)
+
+
+async def test_local_broker_delivers_to_every_socket_of_the_user():
+    dispatcher = NotificationDispatcher()
+    broker = LocalBroker()
+    await broker.start(dispatcher)
+    first, second, other = FakeSocket(), FakeSocket(), FakeSocket()
+    conns = [await dispatcher.connect(1, first), await dispatcher.connect(1, second),
+             await dispatcher.connect(2, other)]
+    try:
+        await broker.publish(1, {"type": "event_updated", "event_id": 5})
+        await until(lambda: first.messages and second.messages)
+        await idle()
+        assert first.messages == second.messages == ['{"type": "event_updated", "event_id": 5}']
+        assert other.messages == []
+    finally:
+        for conn in conns:
+            await dispatcher.disconnect(conn)
+        await broker.stop()
+    assert broker.subscribed == set()
+
+
+async def test_local_broker_drops_a_closed_socket_and_keeps_the_rest():
+    dispatcher = NotificationDispatcher()
+    broker = LocalBroker()
+    await broker.start(dispatcher)
+    alive, closed = FakeSocket(), ClosedSocket()
+    conns = [await dispatcher.connect(1, alive), await dispatcher.connect(1, closed)]
+    try:
+        await broker.publish(1, {"n": 1})
+        await until(lambda: len(dispatcher.connections[1]) == 1)
+        await broker.publish(1, {"n": 2})
+        await until(lambda: len(alive.messages) == 2)
+        assert broker.subscribed == {1}
+    finally:
+        for conn in conns:
+            await dispatcher.disconnect(conn)
+        await broker.stop()
+    assert broker.subscribed == set()
+
+
+@pytest.fixture
+async def workers(tmp_path):
+    """Two workers on one host: a dispatcher and a Unix socket broker each."""
+    pairs = []
+    for _ in range(2):
+        dispatcher, broker = NotificationDispatcher(), UnixSocketBroker(str(tmp_path))
+        await broker.start(dispatcher)
+        pairs.append((dispatcher, broker))
+    yield pairs
+    for dispatcher, broker in pairs:
+        for conns in list(dispatcher.connections.values()):
+            for conn in list(conns):
+                await dispatcher.disconnect(conn)
+        await broker.stop()
+
+
+async def test_unix_broker_reaches_sockets_held_by_other_workers(workers):
+    (da, a), (db, b) = workers
+    here, there, only_there = FakeSocket(), FakeSocket(), FakeSocket()
+    await da.connect(1, here)
+    await db.connect(1, there)
+    await db.connect(2, only_there)
+    await until(lambda: a.routes.get(1) == {b.path} and a.routes.get(2) == {b.path})
+
+    await a.publish(1, {"n": 1})
+    await a.publish(2, {"n": 2})
+    await until(lambda: here.messages and there.messages and only_there.messages)
+    await idle()
+    assert here.messages == there.messages == ['{"n": 1}']
+    assert only_there.messages == ['{"n": 2}']
+
+
+async def test_unix_broker_only_sends_to_workers_holding_the_user(workers):
+    (da, a), (db, b) = workers
+    socket = FakeSocket()
+    conn = await db.connect(1, socket)
+    await until(lambda: 1 in a.routes)
+    await db.disconnect(conn)
+    await until(lambda: 1 not in a.routes)
+
+    await a.publish(1, {"n": 1})
+    await idle()
+    assert socket.messages == []
+
+
+async def test_unix_broker_forgets_a_worker_whose_socket_closed(workers):
+    (da, a), (db, b) = workers
+    here = FakeSocket()
+    await da.connect(1, here)
+    await db.connect(1, FakeSocket())
+    await until(lambda: a.routes.get(1) == {b.path})
+
+    # b dies without saying bye: its socket file stays behind, refusing datagrams
+    asyncio.get_running_loop().remove_reader(b.sock.fileno())
+    b.sock.close()
+    b.sock = None
+    assert os.path.exists(b.path)
+
+    await a.publish(1, {"n": 1})
+    await until(lambda: here.messages)
+    assert here.messages == ['{"n": 1}']
+    assert b.path not in a.peers and 1 not in a.routes
+    assert not os.path.exists(b.path)
@@ -0,0 +1,21 @@
+from app.core.cache import TTLCache
+
+
+def test_groups_follow_eviction_and_pop():
+    cache = TTLCache(3, group=lambda key: key[0])
+    for key in [(1, "a"), (1, "b"), (2, "a"), (2, "b")]:  # (1, "a") is evicted
+        cache.set(key, True)
+    cache.pop((2, "b"))
+    assert cache._groups == {1: {(1, "b")}, 2: {(2, "a")}}
+
+    cache.set((3, "a"), True)
+    cache.pop_groups([1, 4])
+    assert [cache.get(key, None) for key in [(1, "b"), (2, "a"), (3, "a")]] == [None, True, True]
+    assert cache._groups == {2: {(2, "a")}, 3: {(3, "a")}}
+
+
+def test_expired_entries_leave_their_group():
+    cache = TTLCache(10, ttl=-1, group=lambda key: key[0])
+    cache.set((1, "a"), True)
+    assert cache.get((1, "a"), None) is None
+    assert cache._groups == {}
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+
+def test_diff_of_a_reused_event_id_is_not_served_from_the_deleted_event(client, make_user):
+    _, headers = make_user()
+    start = datetime(2090, 5, 1, 9)
+
+    def create_and_edit(titles: list[str]) -> int:
+        response = client.post("/api/events/", headers=headers, json={
+            "title": titles[0], "description": "d",
+            "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat(),
+        })
+        assert response.status_code == 200, response.text
+        event_id = response.json()["id"]
+        for title in titles[1:]:
+            assert client.put(f"/api/events/{event_id}", headers=headers, json={"title": title}).status_code == 200
+        return event_id
+
+    # version N is the event as it was before its Nth update
+    first = create_and_edit(["one", "two", "three"])
+    old = client.get(f"/api/events/{first}/diff", headers=headers, params={"from_version": 1, "to_version": 2})
+    assert old.json() == {"title": {"from": "one", "to": "two"}}
+    assert client.delete(f"/api/events/{first}", headers=headers).status_code == 200
+
+    # the newest row was deleted, so SQLite hands its id out again
+    second = create_and_edit(["four", "five", "six"])
+    assert second == first
+    new = client.get(f"/api/events/{second}/diff", headers={**headers, "If-None-Match": old.headers["ETag"]},
+                     params={"from_version": 1, "to_version": 2})
+    assert new.status_code == 200
+    assert new.headers["ETag"] != old.headers["ETag"]
+    assert new.json() == {"title": {"from": "four", "to": "five"}}
@@ -0,0 +1,22 @@
+def test_freebusy_with_utc_offset_bounds(client, make_user):
+    owner_id, headers = make_user()
+    response = client.post("/api/events/", headers=headers, json={
+        "title": "busy", "description": "d",
+        "start_time": "2080-03-01T10:00:00", "end_time": "2080-03-01T11:00:00",
+    })
+    assert response.status_code == 200, response.text
+
+    # 09:00Z .. 12:00Z, given once as UTC and once with an offset
+    for start, end in (("2080-03-01T09:00:00Z", "2080-03-01T12:00:00Z"),
+                       ("2080-03-01T11:00:00+02:00", "2080-03-01T14:00:00+02:00")):
+        response = client.get("/api/events/freebusy", headers=headers,
+                              params={"user_id": owner_id, "start": start, "end": end, "duration": 30})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["users"] == [{"user_id": owner_id, "busy": [
+            {"start_time": "2080-03-01T10:00:00", "end_time": "2080-03-01T11:00:00"},
+        ]}]
+        assert body["free"] == [
+            {"start_time": "2080-03-01T09:00:00", "end_time": "2080-03-01T10:00:00"},
+            {"start_time": "2080-03-01T11:00:00", "end_time": "2080-03-01T12:00:00"},
+        ]
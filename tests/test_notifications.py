@@ -0,0 +1,45 @@
+import time
+from datetime import datetime, timedelta
+
+
+def stored(client, headers, notification_id: int, count: int) -> dict:
+    """Wait for the outbox drainer to land `count` notifications in row `notification_id`."""
+    for _ in range(100):
+        for item in client.get("/api/notifications", headers=headers).json()["items"]:
+            if item["id"] == notification_id and item["count"] == count:
+                return item
+        time.sleep(0.05)
+    raise AssertionError(f"notification {notification_id} never reached count {count}")
+
+
+def test_resume_replays_updates_merged_into_pushed_rows(client, make_user):
+    _, owner = make_user()
+    guest_id, guest = make_user()
+    start = datetime(2060, 1, 1)
+    response = client.post("/api/events/", headers=owner, json={
+        "title": "Standup", "description": "d",
+        "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=15)).isoformat(),
+    })
+    assert response.status_code == 200, response.text
+    event_id = response.json()["id"]
+    response = client.post(f"/api/events/{event_id}/share", headers=owner, json=[{"user_id": guest_id, "role": "viewer"}])
+    assert response.status_code == 200, response.text
+
+    with client.websocket_connect("/ws/notifications", headers=guest) as ws:
+        assert ws.receive_json()["type"] == "event_shared"
+        client.put(f"/api/events/{event_id}", headers=owner, json={"title": "Standup 2"})
+        pushed = ws.receive_json()
+    assert pushed["count"] == 1 and pushed["message"] == "Event 'Standup 2' was updated."
+    row = stored(client, guest, pushed["notification_id"], 1)
+    assert (pushed["seq"], pushed["message"], pushed["count"]) == (row["seq"], row["message"], row["count"])
+
+    # merged into the row the client already saw while it was away
+    client.put(f"/api/events/{event_id}", headers=owner, json={"title": "Standup 3"})
+    merged = stored(client, guest, pushed["notification_id"], 2)
+    assert merged["seq"] > pushed["seq"]
+
+    with client.websocket_connect(f"/ws/notifications?last_seq={pushed['seq']}", headers=guest) as ws:
+        replayed = ws.receive_json()
+    assert replayed["replayed"] is True
+    assert (replayed["notification_id"], replayed["seq"], replayed["count"], replayed["message"]) == (
+        pushed["notification_id"], merged["seq"], 2, "Event 'Standup 3' was updated.")
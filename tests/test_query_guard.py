@@ -0,0 +1,88 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.query_guard import guard
+
+# every event of the module gets its own hour, so no request hits a conflict
+_slots = itertools.count()
+_BASE = datetime(2040, 1, 1)
+
+
+def batch_of(n: int) -> dict:
+    events = []
+    for _ in range(n):
+        start = _BASE + timedelta(hours=next(_slots))
+        events.append({
+            "title": "t", "description": "d",
+            "start_time": start.isoformat(), "end_time": (start + timedelta(minutes=30)).isoformat(),
+        })
+    return {"events": events}
+
+
+def create_events(client, headers, n: int) -> list[int]:
+    response = client.post("/api/events/batch", headers=headers, json=batch_of(n))
+    assert response.status_code == 200, response.text
+    return [event["id"] for event in response.json()]
+
+
+def test_batch_create_is_set_based(client, make_user, query_guard):
+    _, headers = make_user()
+    query_guard.assert_constant(lambda n: create_events(client, headers, n), sizes=(1, 50))
+
+
+def test_share_event_is_set_based(client, make_user, query_guard):
+    _, headers = make_user()
+    others = [make_user()[0] for _ in range(50)]
+    event_ids = iter(create_events(client, headers, 3))
+
+    def share(n):
+        response = client.post(
+            f"/api/events/{next(event_ids)}/share", headers=headers,
+            json=[{"user_id": user_id, "role": "viewer"} for user_id in others[:n]],
+        )
+        assert response.status_code == 200, response.text
+
+    query_guard.assert_constant(share, sizes=(1, 50))
+
+
+def test_share_events_is_set_based(client, make_user, query_guard):
+    _, headers = make_user()
+    others = [make_user()[0] for _ in range(10)]
+
+    def share(n):
+        response = client.post("/api/events/share", headers=headers, json={
+            "event_ids": create_events(client, headers, n),
+            "permissions": [{"user_id": user_id, "role": "editor"} for user_id in others],
+        })
+        assert response.status_code == 200, response.text
+
+    query_guard.assert_constant(share, sizes=(1, 50))
+
+
+def test_assert_constant_flags_statements_growing_with_size(client, make_user, query_guard):
+    _, headers = make_user()
+    event_id = create_events(client, headers, 1)[0]
+
+    def one_read_per_item(n):
+        for _ in range(n):
+            client.get(f"/api/events/{event_id}/permissions", headers=headers)
+
+    with pytest.raises(pytest.fail.Exception, match="grows with payload size"):
+        query_guard.assert_constant(one_read_per_item, sizes=(1, 5))
+
+
+def test_header_mode_reports_counts_and_budget(client, make_user, query_guard, monkeypatch):
+    _, headers = make_user()
+    monkeypatch.setattr(guard, "mode", "header")
+    query_guard.strict = False
+
+    response = client.get("/api/events/", headers=headers)
+    assert int(response.headers["x-query-count"]) >= 1
+    assert "x-query-budget" not in response.headers
+
+    query_guard.budget("GET", "/api/events/", max_queries=0)
+    response = client.get("/api/events/", headers=headers)
+    assert response.headers["x-query-budget"] == "exceeded"
+    assert query_guard.violations()
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from itertools import islice
+
+import pytest
+
+from app.services.recurrence import Rule, _starts_after, occurrences, parse_rule, series_end
+
+
+def brute_force(dtstart: datetime, dtend: datetime, rule: Rule, limit: int = 2000) -> list[datetime]:
+    """Every occurrence start, walked from the series' own start."""
+    return [
+        start for position, start in islice(_starts_after(dtstart, rule, dtstart - timedelta(microseconds=1)), limit)
+        if (rule.count is None or position < rule.count) and (rule.until is None or start <= rule.until)
+        and start not in rule.exdates
+    ]
+
+
+def test_parse_rule_forms():
+    assert parse_rule("weekly") == Rule("WEEKLY")
+    assert parse_rule("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=5") == Rule("WEEKLY", 2, (0, 2), 5)
+    assert parse_rule('{"freq": "daily", "count": 3}') == Rule("DAILY", count=3)
+    # UNTIL in any notation is naive UTC, like the event times
+    assert parse_rule("FREQ=DAILY;UNTIL=20300101T090000Z").until == datetime(2030, 1, 1, 9)
+    assert parse_rule("FREQ=DAILY;UNTIL=2030-01-01T11:00:00+02:00").until == datetime(2030, 1, 1, 9)
+    for bad in ("FREQ=HOURLY", "FREQ=DAILY;BYDAY=MO", "FREQ=WEEKLY;COUNT=0", "FREQ"):
+        with pytest.raises(ValueError):
+            parse_rule(bad)
+
+
+@pytest.mark.parametrize("pattern", [
+    "FREQ=DAILY;INTERVAL=3;COUNT=40",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=50",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=SU,TU;UNTIL=20310301T000000",
+    "FREQ=MONTHLY;COUNT=30",
+    "FREQ=YEARLY;UNTIL=20400101",
+])
+def test_series_end_and_windows_match_a_full_walk(pattern):
+    dtstart = datetime(2030, 1, 31, 9)  # a Thursday, at the end of a month
+    dtend = dtstart + timedelta(hours=1)
+    rule = parse_rule(pattern)
+    starts = brute_force(dtstart, dtend, rule)
+
+    assert series_end(dtstart, dtend, rule) == starts[-1] + timedelta(hours=1)
+    lo, hi = starts[len(starts) // 3] + timedelta(minutes=30), starts[2 * len(starts) // 3]
+    assert [s for s, _ in occurrences(dtstart, dtend, rule, lo, hi)] == [s for s in starts if s + timedelta(hours=1) > lo and s < hi]
+
+
+def test_monthly_clamps_to_month_end():
+    rule = parse_rule("FREQ=MONTHLY;COUNT=3")
+    dtstart = datetime(2031, 1, 31)
+    starts = [s for s, _ in occurrences(dtstart, dtstart + timedelta(hours=1), rule, dtstart, datetime(2032, 1, 1))]
+    assert starts == [datetime(2031, 1, 31), datetime(2031, 2, 28), datetime(2031, 3, 31)]
+
+
+def test_exdates_are_skipped():
+    rule = parse_rule("FREQ=DAILY;COUNT=3;EXDATE=20310102T090000")
+    dtstart = datetime(2031, 1, 1, 9)
+    starts = [s for s, _ in occurrences(dtstart, dtstart + timedelta(hours=1), rule, dtstart, datetime(2032, 1, 1))]
+    assert starts == [datetime(2031, 1, 1, 9), datetime(2031, 1, 3, 9)]
+
+
+def test_timezone_aware_input_is_stored_and_compared_as_utc(client, make_user):
+    _, headers = make_user()
+    response = client.post("/api/events/", headers=headers, json={
+        "title": "weekly", "description": "d",
+        "start_time": "2070-01-06T11:00:00+02:00", "end_time": "2070-01-06T12:00:00+02:00",
+        "is_recurring": True, "recurrence_pattern": "FREQ=WEEKLY;UNTIL=20700301T000000Z",
+    })
+    assert response.status_code == 200, response.text
+    event = response.json()
+    assert event["start_time"] == "2070-01-06T09:00:00"
+
+    # an earlier series shows up for a window over one of its later occurrences
+    response = client.get("/api/events/", headers=headers, params={"start": "2070-02-03T00:00:00Z", "end": "2070-02-04T00:00:00Z"})
+    assert response.status_code == 200, response.text
+    assert [e["id"] for e in response.json()["items"]] == [event["id"]]
+
+    response = client.get("/api/events/occurrences", headers=headers, params={"start": "2070-02-01T00:00:00Z", "end": "2070-02-15T00:00:00Z"})
+    assert response.status_code == 200, response.text
+    assert [o["start_time"] for o in response.json()] == ["2070-02-03T09:00:00", "2070-02-10T09:00:00"]
+
+    response = client.post("/api/events/", headers=headers, json={
+        "title": "clash", "description": "d",
+        "start_time": "2070-02-17T09:30:00Z", "end_time": "2070-02-17T10:30:00Z",
+    })
+    assert response.status_code == 409, response.text